@@ -0,0 +1,78 @@
+# This file loads startup assets in parallel (worker thread parsing, GL objects created on the context thread)
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .Settings2 import *
+
+
+class AssetLoader:
+    """
+    Startup asset pipeline !
+    - add(): work (parsing, decoding, meshing, no GL calls) starts right away on a thread pool, or on a process
+      pool (process=True) for pure python work the GIL would serialize (picklable work and result)
+    - run(): uploads (GL object creation) run on the calling thread as soon as their work and the assets
+      they come after are done, while the other works keep going
+    - progress(done, total, name) is called after every upload (loading caption, event pumping)
+    """
+
+    def __init__(self, workers=ASSET_WORKERS, processes=ASSET_PROCESSES, progress=None) -> None:
+        """
+        Args:
+            workers (int): worker threads
+            processes (int): worker processes (0: process works run on the threads)
+            progress (function): progress(done, total, name) after every upload
+        """
+
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.processes = ProcessPoolExecutor(max_workers=processes) if processes else None
+        self.progress = progress
+        self.assets = {}  # name: (Future, upload, after)
+        self.results = {}  # name: uploaded asset
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def add(self, name, work=None, upload=None, after=(), process=False):
+        """
+        Args:
+            name (str): asset name (loader[name] once uploaded)
+            work (function): work() -> result, on a worker thread (None: no work)
+            process (bool): run work on a worker process (module level function / functools.partial of one)
+            upload (function): upload(result) -> asset, on the run() thread (None: the result is the asset)
+            after (tuple): asset names uploaded before this upload (added before it)
+        """
+
+        for other in after:
+            if other not in self.assets:
+                raise KeyError(f"Unknown asset: {other}")
+        executor = self.processes if process and work is not None and self.processes is not None else self.executor
+        self.assets[name] = (executor.submit(work or (lambda: None)), upload, tuple(after))
+
+    def run(self):
+        """
+        Uploads every asset (worker errors are raised here)
+
+        Returns:
+            dict: name: asset
+        """
+
+        waiting = dict(self.assets)
+        try:
+            while waiting:
+                ready = [name for name, (future, _, after) in waiting.items()
+                         if future.done() and all(other in self.results for other in after)]
+                if not ready:
+                    wait([future for future, _, _ in waiting.values() if not future.done()], return_when=FIRST_COMPLETED)
+                    continue
+
+                for name in ready:
+                    future, upload, _ = waiting.pop(name)
+                    result = future.result()
+                    self.results[name] = upload(result) if upload is not None else result
+                    if self.progress is not None:
+                        self.progress(len(self.results), len(self.assets), name)
+        finally:
+            # Errors: queued works are dropped
+            self.executor.shutdown(cancel_futures=True)
+            if self.processes is not None:
+                self.processes.shutdown(cancel_futures=True)
+
+        return self.results
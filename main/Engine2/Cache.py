@@ -0,0 +1,197 @@
+# This file caches generated meshes on disk (compressed numpy blobs keyed by a content hash, memory mapped model arrays)
+import hashlib
+import os
+import struct
+import threading
+import zipfile
+import zlib
+import numpy as np
+from .Settings2 import *
+
+
+def temp_name(path) -> str:
+    """
+    Temporary file of a cache entry, unique per process / thread (concurrent loaders)
+    """
+
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class MeshCache:
+    """
+    On-disk mesh cache
+    - Entries are keyed by a hash of everything the mesh depends on (inputs, parameters, mesher version)
+    - Changed inputs give a new key, old entries are never read again
+    """
+
+    def __init__(self, folder=CACHE_FOLDER):
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.folder, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Content hash of arrays / numbers / strings / tuples (None allowed)
+        """
+
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                part = np.ascontiguousarray(part)
+                digest.update(f"{part.dtype.str}{part.shape}".encode())
+                digest.update(part.tobytes())
+            else:
+                digest.update(repr(part).encode())
+            digest.update(b"|")
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, key + ".npz")
+
+    def load(self, key):
+        """
+        Cached arrays (dict) or None
+        """
+
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        try:
+            with np.load(path) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile, zlib.error):
+            # Truncated / corrupt entry: regenerated like a miss
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return arrays
+
+    def save(self, key, **arrays):
+        path = self.path(key)
+        temp_path = temp_name(path)
+        with open(temp_path, "wb") as cache_file:
+            np.savez_compressed(cache_file, **arrays)
+        os.replace(temp_path, path)
+
+
+class ModelCache:
+    """
+    On-disk model cache (ready to upload arrays of parsed model files)
+    - One binary file per source file: header, array table, 64 byte aligned raw arrays
+    - The header keeps the source size, mtime and content hash: a changed mtime with the same content stays valid
+    - Loaded arrays are read only memory maps, uploads read straight from the mapped file
+    """
+
+    HEADER = struct.Struct("<8sIIQq20s")  # magic, version, arrays, source size, source mtime (ns), source sha1
+    ARRAY = struct.Struct("<32s8sQQQ")  # name, dtype, rows, width, offset
+
+    def __init__(self, folder=MODEL_CACHE_FOLDER):
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.folder, exist_ok=True)
+
+    def path(self, source, variant=""):
+        name = hashlib.sha1(f"{os.path.abspath(source)}|{variant}".encode()).hexdigest()[:16]
+        return os.path.join(self.folder, f"{os.path.basename(source)}.{name}.model")
+
+    @staticmethod
+    def source_hash(source) -> bytes:
+        with open(source, "rb") as source_file:
+            return hashlib.sha1(source_file.read()).digest()
+
+    def load(self, source, variant=""):
+        """
+        Memory mapped arrays (dict) of source or None (missing or stale entry)
+        """
+
+        path = self.path(source, variant)
+        try:
+            with open(path, "rb") as model_file:
+                magic, version, count, size, mtime, digest = self.HEADER.unpack(model_file.read(self.HEADER.size))
+                table = [self.ARRAY.unpack(model_file.read(self.ARRAY.size)) for _ in range(count)]
+                file_size = os.fstat(model_file.fileno()).st_size
+            stat = os.stat(source)
+        except (OSError, struct.error):
+            self.misses += 1
+            return None
+
+        if (magic != MODEL_CACHE_MAGIC or version != MODEL_CACHE_VERSION or size != stat.st_size or
+                not self.inside(table, file_size)):
+            # Truncated / partly written entries are regenerated like a miss
+            self.misses += 1
+            return None
+
+        if mtime != stat.st_mtime_ns:
+            # Touched source: still valid when the content is the same (the new mtime is stored)
+            if digest != self.source_hash(source):
+                self.misses += 1
+                return None
+            with open(path, "r+b") as model_file:
+                model_file.write(self.HEADER.pack(magic, version, count, size, stat.st_mtime_ns, digest))
+
+        self.hits += 1
+        return self.mapped(path, table)
+
+    @staticmethod
+    def inside(table, file_size) -> bool:
+        """
+        Whether every array table entry has a valid dtype and lies inside the file
+        """
+
+        for name, dtype, rows, width, offset in table:
+            try:
+                itemsize = np.dtype(dtype.rstrip(b"\0").decode()).itemsize
+            except (TypeError, ValueError):
+                return False
+            if offset + rows * max(width, 1) * itemsize > file_size:
+                return False
+        return True
+
+    @staticmethod
+    def mapped(path, table):
+        """
+        Read only views of the array table entries (width 0: 1D array)
+        """
+
+        mapped = np.memmap(path, np.uint8, "r")
+        arrays = {}
+        for name, dtype, rows, width, offset in table:
+            dtype = np.dtype(dtype.rstrip(b"\0").decode())
+            data = mapped[offset:offset + rows * max(width, 1) * dtype.itemsize].view(dtype)
+            arrays[name.rstrip(b"\0").decode()] = data.reshape(rows, width) if width else data
+        return arrays
+
+    def save(self, source, variant="", **arrays):
+        """
+        Writes the arrays of source, returns them memory mapped
+        """
+
+        stat = os.stat(source)
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+        offset = self.HEADER.size + self.ARRAY.size * len(arrays)
+        table = []
+        for name, array in arrays.items():
+            offset = -(-offset // MODEL_CACHE_ALIGN) * MODEL_CACHE_ALIGN
+            width = array.shape[1] if array.ndim == 2 else 0
+            table.append((name.encode(), array.dtype.str.encode(), len(array), width, offset))
+            offset += array.nbytes
+
+        path = self.path(source, variant)
+        temp_path = temp_name(path)
+        with open(temp_path, "wb") as model_file:
+            model_file.write(self.HEADER.pack(MODEL_CACHE_MAGIC, MODEL_CACHE_VERSION, len(arrays), stat.st_size,
+                                              stat.st_mtime_ns, self.source_hash(source)))
+            model_file.write(b"".join(self.ARRAY.pack(*entry) for entry in table))
+            for entry, array in zip(table, arrays.values()):
+                model_file.write(bytes(entry[4] - model_file.tell()))
+                model_file.write(array.tobytes())
+        os.replace(temp_path, path)
+
+        # Stored names / dtypes come back zero padded from a read table
+        return self.mapped(path, table)
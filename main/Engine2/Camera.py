@@ -50,7 +50,10 @@ class Camera:
         if (angle < CAMERA_ROTATE_PITCHUP_MAX and pitch > 0) or (angle > CAMERA_ROTATE_PITCHDOWN_MAX and pitch < 0):
             self.transformation = rotate(self.transformation, pitch, "X", CAMERA_ROTATE_PITCH_LOCAL)
 
-    def update(self, program_id) -> None:
+    def move(self) -> None:
+        """
+        Mouse look and key movement of one frame (call once per frame, before drawing)
+        """
         if pygame.mouse.get_visible():
             return
         
@@ -70,6 +73,10 @@ class Camera:
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
             self.transformation = translate(self.transformation, -self.key_sensitivity, 0, 0)
 
+    def update(self, program_id) -> None:
+        """
+        Loads the projection / view uniforms of the program
+        """
         self.projection.find_variable(program_id, "projection_mat")
         self.projection.load()
         lookat_mat = self.transformation
@@ -3,6 +3,7 @@ import pygame
 from main.Engine2.Mesh import *
 from main.Engine2.Settings2 import *
 from main.Engine2.Transformations import Rotation
+from main.Engine2.Frustum import frustum_planes, visible_boxes, box_ranges, transform_boxes
 
 
 class CellAttach:
@@ -10,71 +11,391 @@ class CellAttach:
     Attach multiple draw cells together
     - Avoiding draw loops!
     - One line draw (world.draw()) !
+    - dynamic: cells can be added / removed / replaced later, only the edited cell range is uploaded, draw()
+      compacts the freed ranges a few cells per frame
+    - culling: draw() only draws cells whose bounding box is inside the camera frustum
+    - occlusion: draw() skips cells hidden by the terrain (Horizon.HorizonCuller)
+    - spatial: cell boxes are kept in a Spatial.SpatialIndex grid (follows add() / remove() / replace())
     """
 
-    def __init__(self, cells: list[object], draw_type=GL_TRIANGLES, shader=None, image=None, rotation=Rotation(0, pygame.Vector3(0, 1, 0))) -> None:
+    def __init__(self, cells: list[object], draw_type=GL_TRIANGLES, shader=None, image=None, rotation=Rotation(0, pygame.Vector3(0, 1, 0)), indexed=False,
+                 dynamic=False, capacity=None, compact=False, culling=True, occlusion=None,
+                 spatial=None) -> None:
+        """
+        dynamic: (bool): keep every cell in its own buffer range for add() / remove() / replace() (never indexed)
+        capacity: (int): dynamic vertex capacity (None: attached vertices + CELL_CAPACITY_HEADROOM), grows when full
+        compact: (bool): compact vertex format (Mesh compact, static worlds only)
+        culling: (bool): frustum culling of cells in draw() (world.draw() always draws everything)
+        occlusion: (main.Engine2.Horizon.HorizonCuller): terrain occlusion culling of cells in draw()
+        spatial: (main.Engine2.Spatial.SpatialIndex): scene index the cells register with (world boxes)
+        """
         print("Attaching Cells...")
         self.image = image
-        self.cells = cells
+        self.cells = list(cells)
         
         self.world_formatted_vertices = []  # world vertices formatted in triangle order
         self.world_formatted_uvs = []
         self.world_formatted_normals = []
+        self.world_formatted_tiles = None  # greedy chunk atlas tiles
         self.world_shader = shader
         self.rotation = rotation
+        self.indexed = indexed and not dynamic
+        self.dynamic = dynamic
+        self.compact_format = compact and not dynamic
+        self.culling = culling
+        self.occlusion = occlusion
+        self.spatial = spatial
         self.world = None
         self.world_draw_type = draw_type
-        self.colors = []
+        self.color = (CHUNK_COLOR_R, CHUNK_COLOR_G, CHUNK_COLOR_B)
         self.call_time = 0
 
+        # Dynamic buffer ranges
+        self.ranges = {}  # cell: (first vertex, vertex count)
+        self.boxes = {}  # cell: (low corner, high corner), None for empty cells
+        self.cull_cache = None  # firsts, counts, lows, highs of non empty cells
+        self.free = []  # (first vertex, vertex count) holes, sorted
+        self.packed = True  # no cell fits a free hole below it (compact() has nothing to move)
+        self.used = 0  # vertices up to the last used range (drawn)
+        self.capacity = 0
+
         self.attach_vertices(self.cells)
         self.attach_uvs(self.cells)
         self.attach_normals(self.cells)
-        self.load_world()
+        self.attach_tiles(self.cells)
+        self.load_ranges()
+
+        if self.dynamic:
+            self.load_dynamic(capacity)
+        else:
+            self.load_world()
+
+        for cell in self.cells:
+            self.register(cell)
 
     def attach_vertices(self, cells):
-        if len(cells) < 2:
+        if len(cells) < 1:
             print("\n\nERROR: NO ENOUGH CELLS TO ATTACH!\n\n")
+            self.world_formatted_vertices = np.zeros((0, 3), np.float32)
             return 0
-            
-        self.world_formatted_vertices = np.concatenate((cells[0].vertices, cells[1].vertices))
-        
-        for instance in cells[2:]:
-            self.world_formatted_vertices = np.concatenate((self.world_formatted_vertices, instance.vertices))
+
+        self.world_formatted_vertices = np.concatenate([instance.vertices for instance in cells])
 
     def attach_uvs(self, cells):
-        if len(cells) < 2:
+        if len(cells) < 1:
             print("ERROR: NO ENOUGH CELLS TO ATTACH!")
+            self.world_formatted_uvs = np.zeros((0, 2), np.float32)
             return 0
 
-        self.world_formatted_uvs = np.concatenate((cells[0].vertex_uvs, cells[1].vertex_uvs))
-        
-        for instance in cells[2:]:
-            self.world_formatted_uvs = np.concatenate((self.world_formatted_uvs, instance.vertex_uvs))
+        self.world_formatted_uvs = np.concatenate([instance.vertex_uvs for instance in cells])
 
     def attach_normals(self, cells):
-        if len(cells) < 2:
+        if len(cells) < 1:
             print("ERROR: NO ENOUGH CELLS TO ATTACH!")
+            self.world_formatted_normals = np.zeros((0, 3), np.float32)
             return 0
 
-        self.world_formatted_normals = np.concatenate((cells[0].normals, cells[1].normals))
-
-        for instance in cells[2:]:
-            self.world_formatted_normals = np.concatenate((self.world_formatted_normals, instance.normals))
+        self.world_formatted_normals = np.concatenate([instance.normals for instance in cells])
                 
-    def load_world(self):
-        for _ in range(len(self.world_formatted_vertices * 3)):
-            self.colors.append(CHUNK_COLOR_R)
-            self.colors.append(CHUNK_COLOR_G)
-            self.colors.append(CHUNK_COLOR_B)
+    def attach_tiles(self, cells):
+        if len(cells) < 1 or getattr(cells[0], "vertex_tiles", None) is None:
+            return 0
 
+        self.world_formatted_tiles = np.concatenate([instance.vertex_tiles for instance in cells])
+
+    def load_world(self):
         self.world = Mesh(
             vertices=self.world_formatted_vertices,
             imagefile=self.image,
             material=self.world_shader,
             draw_type=self.world_draw_type,
-            vertex_colors=self.colors,
+            color=self.color,
             vertex_uvs=self.world_formatted_uvs,
             vertex_normals=self.world_formatted_normals,
+            vertex_tiles=self.world_formatted_tiles,
+            indexed=self.indexed,
+            compact=self.compact_format,
             rotation=self.rotation
         )
+
+    def load_ranges(self):
+        first = 0
+        for cell in self.cells:
+            self.ranges[cell] = (first, len(cell.vertices))
+            self.boxes[cell] = self.cell_box(cell)
+            first += len(cell.vertices)
+
+        self.used = first
+
+    def register(self, cell):
+        """
+        Puts the cell world box into the spatial index (empty cells are left out)
+        """
+
+        if self.spatial is None:
+            return
+
+        if self.boxes.get(cell) is None:
+            if cell in self.spatial:
+                self.spatial.remove(cell)
+            return
+
+        lows, highs = transform_boxes(*self.boxes[cell], self.world.transformation_mat)
+        self.spatial.insert(cell, lows[0], highs[0], grid=True)
+
+    def unregister(self, cell):
+        if self.spatial is not None and cell in self.spatial:
+            self.spatial.remove(cell)
+
+    @staticmethod
+    def cell_box(cell):
+        if len(cell.vertices) == 0:
+            return None
+
+        vertices = np.asarray(cell.vertices, np.float32).reshape(-1, 3)
+        return vertices.min(axis=0), vertices.max(axis=0)
+
+    def cull_arrays(self):
+        if self.cull_cache is None:
+            cells = [cell for cell in self.ranges if self.boxes[cell] is not None]
+            self.cull_cache = (np.array([self.ranges[cell][0] for cell in cells], np.int64),
+                               np.array([self.ranges[cell][1] for cell in cells], np.int64),
+                               np.array([self.boxes[cell][0] for cell in cells], np.float32).reshape(-1, 3),
+                               np.array([self.boxes[cell][1] for cell in cells], np.float32).reshape(-1, 3))
+        return self.cull_cache
+
+    def draw(self, camera, light):
+        """
+        Draws the world (cells inside the camera frustum when culling, not hidden by the terrain with occlusion)
+        - dynamic: free holes left by remove() / replace() are compacted (CELL_COMPACT_BUDGET cells per frame)
+        """
+
+        if self.dynamic and self.free and not self.packed:
+            self.packed = self.compact(CELL_COMPACT_BUDGET) == 0
+
+        if self.culling or self.occlusion is not None:
+            firsts, counts, lows, highs = self.cull_arrays()
+            visible = np.ones(len(firsts), bool)
+            if self.culling:
+                planes = frustum_planes(camera.projection_mat, camera.transformation, self.world.transformation_mat)
+                visible &= visible_boxes(planes, lows, highs)
+            if self.occlusion is not None and visible.any():
+                world_lows, world_highs = transform_boxes(lows[visible], highs[visible], self.world.transformation_mat)
+                visible[visible] = self.occlusion.visible_boxes(camera, world_lows, world_highs)
+            self.world.draw_ranges = box_ranges(firsts, counts, visible)
+            try:
+                self.world.draw(camera, light)
+            finally:
+                # Culled ranges hold for this draw only (world.draw() draws everything)
+                self.world.draw_ranges = None
+        else:
+            self.world.draw(camera, light)
+
+    def load_dynamic(self, capacity=None):
+        self.resize(max(capacity or 0, int(self.used * (1 + CELL_CAPACITY_HEADROOM)), 1))
+
+    def resize(self, capacity):
+        """
+        Reallocates the world buffers with capacity vertices (used ranges kept)
+        """
+
+        def padded(array, width):
+            result = np.zeros((capacity, width), np.float32)
+            result[:self.used] = array[:self.used]
+            return result
+
+        self.capacity = capacity
+        self.world_formatted_vertices = padded(self.world_formatted_vertices, 3)
+        self.world_formatted_uvs = padded(self.world_formatted_uvs, 2)
+        self.world_formatted_normals = padded(self.world_formatted_normals, 3)
+        if self.world_formatted_tiles is not None:
+            self.world_formatted_tiles = padded(self.world_formatted_tiles, 4)
+
+        texture = None
+        if self.world is not None:
+            texture = getattr(self.world, "image", None)
+            self.world.delete()
+
+        self.world = Mesh(
+            vertices=self.world_formatted_vertices,
+            imagefile=self.image if texture is None else None,
+            texture=texture,
+            material=self.world_shader,
+            draw_type=self.world_draw_type,
+            color=self.color,
+            vertex_uvs=self.world_formatted_uvs,
+            vertex_normals=self.world_formatted_normals,
+            vertex_tiles=self.world_formatted_tiles,
+            dynamic=True,
+            rotation=self.rotation
+        )
+        self.world.vertex_count = self.used
+
+    def upload(self, first, count, positions_only=False):
+        """
+        Patches world buffer rows [first:first + count] from the world arrays
+        """
+
+        last = first + count
+        self.world.attributes["position"].update(self.world_formatted_vertices[first:last], first)
+        if positions_only:
+            return
+
+        self.world.attributes["vertex_uv"].update(self.world_formatted_uvs[first:last], first)
+        self.world.attributes["vertex_normal"].update(self.world_formatted_normals[first:last], first)
+        if self.world_formatted_tiles is not None:
+            self.world.attributes["vertex_tile"].update(self.world_formatted_tiles[first:last], first)
+
+    def write(self, cell, first):
+        last = first + len(cell.vertices)
+        self.world_formatted_vertices[first:last] = cell.vertices
+        self.world_formatted_uvs[first:last] = cell.vertex_uvs
+        self.world_formatted_normals[first:last] = cell.normals
+        if self.world_formatted_tiles is not None:
+            self.world_formatted_tiles[first:last] = cell.vertex_tiles
+        self.upload(first, len(cell.vertices))
+
+    def take_free(self, count, before=None):
+        """
+        First free hole fitting count vertices (below before), None if there is no such hole
+        """
+
+        for i, (first, size) in enumerate(self.free):
+            if before is not None and first >= before:
+                return None
+            if size >= count:
+                if size == count:
+                    del self.free[i]
+                else:
+                    self.free[i] = (first + count, size - count)
+                return first
+
+        return None
+
+    def allocate(self, count):
+        first = self.take_free(count)
+        if first is not None:
+            return first
+
+        if self.used + count > self.capacity:
+            self.resize(max(self.capacity * 2, self.used + count))
+
+        first = self.used
+        self.used += count
+        self.world.vertex_count = self.used
+        return first
+
+    def release(self, first, count):
+        """
+        Frees a range (degenerate triangles until reused), trims the drawn range
+        """
+
+        if count == 0:
+            return
+
+        self.world_formatted_vertices[first:first + count] = 0
+        self.upload(first, count, positions_only=True)
+
+        self.free.append((first, count))
+        self.free.sort()
+        self.packed = False
+        merged = [self.free[0]]
+        for f_first, f_count in self.free[1:]:
+            m_first, m_count = merged[-1]
+            if m_first + m_count == f_first:
+                merged[-1] = (m_first, m_count + f_count)
+            else:
+                merged.append((f_first, f_count))
+        self.free = merged
+
+        if self.free[-1][0] + self.free[-1][1] == self.used:
+            self.used = self.free.pop()[0]
+            self.world.vertex_count = self.used
+
+    def add(self, cell):
+        """
+        Attaches a cell (uploads only its range)
+        """
+
+        if not self.dynamic:
+            print("ERROR: CELL ATTACH IS NOT DYNAMIC!")
+            return 0
+
+        first = self.allocate(len(cell.vertices)) if len(cell.vertices) else 0
+        self.ranges[cell] = (first, len(cell.vertices))
+        self.boxes[cell] = self.cell_box(cell)
+        self.cull_cache = None
+        self.packed = False
+        self.cells.append(cell)
+        self.write(cell, first)
+        self.register(cell)
+
+    def remove(self, cell):
+        """
+        Detaches a cell (its range is freed)
+        """
+
+        first, count = self.ranges.pop(cell)
+        self.boxes.pop(cell)
+        self.cull_cache = None
+        self.cells.remove(cell)
+        self.release(first, count)
+        self.unregister(cell)
+
+    def replace(self, cell, new_cell=None):
+        """
+        Replaces a cell with new_cell (None: cell was rebuilt in place), reuses its range when it fits
+        """
+
+        new_cell = cell if new_cell is None else new_cell
+        first, count = self.ranges.pop(cell)
+        self.boxes.pop(cell)
+        self.cull_cache = None
+        new_count = len(new_cell.vertices)
+
+        if new_count <= count:
+            self.release(first + new_count, count - new_count)
+        else:
+            self.release(first, count)
+            first = self.allocate(new_count)
+
+        self.cells[self.cells.index(cell)] = new_cell
+        self.ranges[new_cell] = (first, new_count)
+        self.boxes[new_cell] = self.cell_box(new_cell)
+        self.write(new_cell, first)
+        self.unregister(cell)
+        self.register(new_cell)
+
+    def compact(self, budget=CELL_COMPACT_BUDGET):
+        """
+        Moves up to budget top most cells down into free holes (call once per frame)
+        - Empty cells are skipped, cells fitting no hole below them are passed for the next one down
+
+        Returns:
+            int: moved cells
+        """
+
+        moved = 0
+        cells = sorted(((first, count, cell) for cell, (first, count) in self.ranges.items() if count),
+                       key=lambda item: item[0], reverse=True)
+        for first, count, cell in cells:
+            if moved >= budget or not self.free:
+                break
+            target = self.take_free(count, before=first)
+            if target is None:
+                continue
+
+            last = first + count
+            self.world_formatted_vertices[target:target + count] = self.world_formatted_vertices[first:last]
+            self.world_formatted_uvs[target:target + count] = self.world_formatted_uvs[first:last]
+            self.world_formatted_normals[target:target + count] = self.world_formatted_normals[first:last]
+            if self.world_formatted_tiles is not None:
+                self.world_formatted_tiles[target:target + count] = self.world_formatted_tiles[first:last]
+            self.upload(target, count)
+
+            self.ranges[cell] = (target, count)
+            self.cull_cache = None
+            self.release(first, count)
+            moved += 1
+
+        return moved
@@ -4,23 +4,78 @@ from OpenGL.GL import *
 
 
 class DataHandler:
-    def __init__(self, data_type, data):
+    """
+    Vertex attribute buffer (vec2/vec3/vec4), element buffer ("index") or interleaved buffer ("interleaved")
+    """
+    def __init__(self, data_type, data, usage=GL_STATIC_DRAW, layout=None):
+        """
+        layout: (VertexLayout): "interleaved" data layout (data is VertexLayout.pack() output)
+        """
         self.data_type = data_type
         self.data = data
+        self.usage = usage
+        self.layout = layout
         self.buffer_ref = glGenBuffers(1)
         self.load()
 
     def load(self):
-        data = np.array(self.data, np.float32)
+        if self.data_type == "index":
+            data = np.ascontiguousarray(self.data, np.uint32)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.buffer_ref)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, data.ravel(), self.usage)
+            return
+
+        if self.data_type == "interleaved":
+            data = np.ascontiguousarray(self.data, self.layout.dtype)
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffer_ref)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data.view(np.uint8), self.usage)
+            return
+
+        # No copy of float32 arrays (memory mapped model arrays upload straight from the file)
+        data = np.ascontiguousarray(self.data, np.float32)
         glBindBuffer(GL_ARRAY_BUFFER, self.buffer_ref)
-        glBufferData(GL_ARRAY_BUFFER, data.ravel(), GL_STATIC_DRAW)
+        glBufferData(GL_ARRAY_BUFFER, data.ravel(), self.usage)
+
+    def update(self, data, first):
+        """
+        Patches buffer rows [first:first + len(data)] in place (glBufferSubData)
+        """
+
+        if self.data_type == "index":
+            data = np.ascontiguousarray(data, np.uint32)
+            target = GL_ELEMENT_ARRAY_BUFFER
+        elif self.data_type == "interleaved":
+            data = np.ascontiguousarray(data, self.layout.dtype)
+            target = GL_ARRAY_BUFFER
+        else:
+            data = np.ascontiguousarray(data, np.float32)
+            target = GL_ARRAY_BUFFER
+
+        if data.size == 0:
+            return
+
+        row_bytes = data.nbytes // len(data)
+        glBindBuffer(target, self.buffer_ref)
+        glBufferSubData(target, first * row_bytes, data.nbytes, data.view(np.uint8).ravel())
+
+    def create_variable(self, program_id, variable_name, divisor=0):
+        """
+        divisor: (int): advance once every divisor instances (0: every vertex)
+        """
 
-    def create_variable(self, program_id, variable_name):
-        variable_id = glGetAttribLocation(program_id, variable_name)
         glBindBuffer(GL_ARRAY_BUFFER, self.buffer_ref)
+        if self.data_type == "interleaved":
+            self.layout.create_variables(program_id)
+            return
+
+        variable_id = glGetAttribLocation(program_id, variable_name)
         if self.data_type == "vec3":
             glVertexAttribPointer(variable_id, 3, GL_FLOAT, False, 0, None)
         elif self.data_type == "vec2":
             glVertexAttribPointer(variable_id, 2, GL_FLOAT, False, 0, None)
+        elif self.data_type == "vec4":
+            glVertexAttribPointer(variable_id, 4, GL_FLOAT, False, 0, None)
 
         glEnableVertexAttribArray(variable_id)
+        if divisor:
+            glVertexAttribDivisor(variable_id, divisor)
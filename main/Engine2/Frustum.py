@@ -0,0 +1,87 @@
+# This file tests bounding boxes against the camera view frustum
+import numpy as np
+
+
+def frustum_planes(projection_mat, view_mat, model_mat=None) -> np.ndarray:
+    """
+    Frustum planes of P * inverse(V) * M (same matrices as the shaders)
+
+    Returns:
+        np.ndarray: (6, 4) planes (a, b, c, d), inside when a*x + b*y + c*z + d >= 0 (left, right, bottom, top, near, far)
+    """
+
+    clip = np.asarray(projection_mat, np.float64) @ np.linalg.inv(np.asarray(view_mat, np.float64))
+    if model_mat is not None:
+        clip = clip @ np.asarray(model_mat, np.float64)
+
+    return np.array([
+        clip[3] + clip[0],
+        clip[3] - clip[0],
+        clip[3] + clip[1],
+        clip[3] - clip[1],
+        clip[3] + clip[2],
+        clip[3] - clip[2]
+    ])
+
+
+def visible_boxes(planes, lows, highs) -> np.ndarray:
+    """
+    Axis aligned boxes touching the frustum (conservative: boxes near frustum corners may pass)
+
+    Args:
+        planes (np.ndarray): frustum_planes() output
+        lows (np.ndarray): (n, 3) box minimum corners
+        highs (np.ndarray): (n, 3) box maximum corners
+
+    Returns:
+        np.ndarray: (n,) bool
+    """
+
+    normals = planes[:, :3]
+    # Box corner furthest along every plane normal
+    corners = np.where(normals[None, :, :] >= 0, highs[:, None, :], lows[:, None, :])
+    distances = np.einsum("npk,pk->np", corners, normals) + planes[:, 3]
+    return np.all(distances >= 0, axis=1)
+
+
+def box_ranges(firsts, counts, visible):
+    """
+    Visible (first, count) draw ranges, touching ranges merged
+
+    Returns:
+        firsts (np.ndarray int32), counts (np.ndarray int32)
+    """
+
+    firsts = np.asarray(firsts, np.int64)[visible]
+    counts = np.asarray(counts, np.int64)[visible]
+    if len(firsts) == 0:
+        return firsts.astype(np.int32), counts.astype(np.int32)
+
+    order = np.argsort(firsts, kind="stable")
+    firsts = firsts[order]
+    counts = counts[order]
+    starts = np.ones(len(firsts), bool)
+    starts[1:] = firsts[1:] != firsts[:-1] + counts[:-1]
+    groups = np.cumsum(starts) - 1
+    merged_counts = np.bincount(groups, weights=counts).astype(np.int32)
+    return firsts[starts].astype(np.int32), merged_counts
+
+
+def transform_boxes(lows, highs, model_mat=None):
+    """
+    World axis aligned boxes around model space boxes (all 8 corners transformed)
+
+    Returns:
+        lows, highs (np.ndarray): (n, 3)
+    """
+
+    lows = np.asarray(lows, np.float64).reshape(-1, 3)
+    highs = np.asarray(highs, np.float64).reshape(-1, 3)
+    if model_mat is None:
+        return lows, highs
+
+    model_mat = np.asarray(model_mat, np.float64)
+    corners = np.stack([np.where(np.array([x, y, z], bool), highs, lows)
+                        for x in (0, 1) for y in (0, 1) for z in (0, 1)], axis=1)
+    corners = corners @ model_mat[:3, :3].T + model_mat[:3, 3]
+    return corners.min(axis=1), corners.max(axis=1)
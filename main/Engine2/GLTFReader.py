@@ -0,0 +1,180 @@
+# This file reads glTF 2.0 / GLB files (accessors are numpy views of memory mapped buffers)
+import base64
+import io
+import json
+import os
+import struct
+from urllib.parse import unquote
+import numpy as np
+import pygame
+
+GLB_MAGIC = b"glTF"
+GLB_JSON = 0x4E4F534A
+GLB_BIN = 0x004E4942
+
+# Accessor component types / element widths
+GLTF_COMPONENTS = {5120: "<i1", 5121: "<u1", 5122: "<i2", 5123: "<u2", 5125: "<u4", 5126: "<f4"}
+GLTF_WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+GLTF_TRIANGLES = 4
+
+
+def flat_normals(positions) -> np.ndarray:
+    """
+    Face normals of non indexed triangles (every 3 vertices are a triangle), repeated for their 3 vertices
+    """
+
+    corners = np.asarray(positions, np.float32)[:len(positions) // 3 * 3].reshape(-1, 3, 3)
+    faces = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    faces /= np.maximum(np.linalg.norm(faces, axis=1, keepdims=True), 1e-20)
+    return np.repeat(faces, 3, axis=0)
+
+
+class GLTFFile:
+    """
+    glTF 2.0 (.gltf) / GLB (.glb) file
+    - Binary buffers are memory mapped (GLB BIN chunk, external .bin files), data uris are decoded once
+    - accessor() returns numpy views of the buffers (byteStride kept as view strides, no copy),
+      normalized integer accessors are converted to floats
+    - Images: embedded (buffer views, data uris) or external files, loaded as pygame surfaces
+    - Not supported: sparse accessors, primitive modes other than triangles
+    """
+
+    def __init__(self, filename) -> None:
+        self.filename = filename
+        self.folder = os.path.dirname(filename)
+        self.buffers = []
+
+        with open(filename, "rb") as gltf_file:
+            glb = gltf_file.read(4) == GLB_MAGIC
+
+        binary = None
+        if glb:
+            mapped = np.memmap(filename, np.uint8, "r")
+            _, version, length = struct.unpack("<4sII", mapped[:12].tobytes())
+            if version != 2:
+                raise ValueError(f"Unsupported GLB version {version}: {filename}")
+
+            offset = 12
+            while offset < length:
+                chunk_length, chunk_type = struct.unpack("<II", mapped[offset:offset + 8].tobytes())
+                chunk = mapped[offset + 8:offset + 8 + chunk_length]
+                if chunk_type == GLB_JSON:
+                    self.document = json.loads(chunk.tobytes())
+                elif chunk_type == GLB_BIN and binary is None:
+                    binary = chunk
+                offset += 8 + chunk_length
+        else:
+            with open(filename, "rb") as gltf_file:
+                self.document = json.load(gltf_file)
+
+        for buffer in self.document.get("buffers", []):
+            uri = buffer.get("uri")
+            if uri is None:
+                self.buffers.append(binary)
+            else:
+                self.buffers.append(self.uri_bytes(uri)[:buffer["byteLength"]])
+
+        self.surfaces = {}  # image index: pygame surface
+
+    def uri_bytes(self, uri) -> np.ndarray:
+        """
+        Data uris are decoded, files are memory mapped
+        """
+
+        if uri.startswith("data:"):
+            return np.frombuffer(base64.b64decode(uri.split(",", 1)[1]), np.uint8)
+        return np.memmap(os.path.join(self.folder, unquote(uri)), np.uint8, "r")
+
+    def view(self, index) -> np.ndarray:
+        """
+        Bytes of a buffer view
+        """
+
+        view = self.document["bufferViews"][index]
+        start = view.get("byteOffset", 0)
+        return self.buffers[view["buffer"]][start:start + view["byteLength"]]
+
+    def accessor(self, index) -> np.ndarray:
+        """
+        (count, width) view of an accessor ((count,) for scalars), float32 copy of normalized integers
+        """
+
+        accessor = self.document["accessors"][index]
+        if "sparse" in accessor:
+            raise ValueError(f"Sparse accessors are not supported: {self.filename}")
+
+        dtype = np.dtype(GLTF_COMPONENTS[accessor["componentType"]])
+        width = GLTF_WIDTHS[accessor["type"]]
+        count = accessor["count"]
+        if "bufferView" not in accessor:
+            return np.zeros((count, width) if width > 1 else count, dtype)
+
+        view = self.document["bufferViews"][accessor["bufferView"]]
+        stride = view.get("byteStride") or dtype.itemsize * width
+        data = np.ndarray((count, width), dtype, buffer=self.buffers[view["buffer"]],
+                          offset=view.get("byteOffset", 0) + accessor.get("byteOffset", 0),
+                          strides=(stride, dtype.itemsize))
+        if accessor.get("normalized") and dtype.kind in "iu":
+            # Unsigned: value / max, signed: max(value / max, -1)
+            data = np.maximum(data / np.float32(np.iinfo(dtype).max), -1).astype(np.float32)
+        return data[:, 0] if width == 1 else data
+
+    def primitives(self):
+        """
+        (mesh index, primitive index) of every triangle primitive
+        """
+
+        return [(m, p) for m, mesh in enumerate(self.document.get("meshes", []))
+                for p, primitive in enumerate(mesh["primitives"]) if primitive.get("mode", GLTF_TRIANGLES) == GLTF_TRIANGLES]
+
+    def primitive(self, mesh=0, primitive=0):
+        """
+        Mesh inputs of a primitive (mesh space, node transforms are not applied)
+
+        Returns:
+            vertices (np.ndarray), vertex_normals, vertex_uvs, indices (None: not indexed), image (index or None)
+            - Without NORMAL the primitive is de-indexed and gets flat normals
+            - uvs keep the glTF top left origin (textures are uploaded with Texture(flip=False))
+        """
+
+        primitive = self.document["meshes"][mesh]["primitives"][primitive]
+        attributes = primitive["attributes"]
+        vertices = self.accessor(attributes["POSITION"])
+        indices = self.accessor(primitive["indices"]) if "indices" in primitive else None
+
+        if "TEXCOORD_0" in attributes:
+            uvs = self.accessor(attributes["TEXCOORD_0"])
+        else:
+            uvs = np.zeros((len(vertices), 2), np.float32)
+
+        if "NORMAL" in attributes:
+            normals = self.accessor(attributes["NORMAL"])
+        else:
+            # Flat normals (required by the spec): triangles get their own vertices
+            if indices is not None:
+                vertices, uvs, indices = vertices[indices], uvs[indices], None
+            normals = flat_normals(vertices)
+
+        image = None
+        material = primitive.get("material")
+        if material is not None:
+            base = self.document["materials"][material].get("pbrMetallicRoughness", {}).get("baseColorTexture")
+            if base is not None:
+                image = self.document["textures"][base["index"]].get("source")
+
+        return vertices, normals, uvs, indices, image
+
+    def surface(self, index) -> pygame.Surface:
+        """
+        pygame surface of an image (loaded once)
+        """
+
+        if index not in self.surfaces:
+            image = self.document["images"][index]
+            if "bufferView" in image:
+                data = self.view(image["bufferView"]).tobytes()
+            else:
+                data = self.uri_bytes(image["uri"]).tobytes()
+            hint = image["mimeType"].split("/")[-1] if "mimeType" in image else image["uri"].rsplit(".", 1)[-1]
+            self.surfaces[index] = pygame.image.load(io.BytesIO(data), f"image.{hint}")
+        return self.surfaces[index]
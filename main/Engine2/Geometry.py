@@ -0,0 +1,87 @@
+# This file shares uploaded geometry (vao, buffers) between meshes built from the same source
+from OpenGL.GL import *
+from .Cache import MeshCache
+
+# Mesh attributes of the uploaded data (shared), the transformation, texture and material stay per mesh
+GEOMETRY_FIELDS = ("vertices", "vertex_normals", "vertex_uvs", "indices", "instance_offsets", "vertex_count", "layout",
+                   "position_decode", "center", "bounds", "vao_ref", "buffers", "attributes", "element_buffer",
+                   "draw_ranges", "lods")
+
+
+class Geometry:
+    """
+    Uploaded data of a registered mesh, reference counted by the meshes drawing it
+    """
+
+    def __init__(self, registry, key, mesh) -> None:
+        self.registry = registry
+        self.key = key
+        self.fields = {name: getattr(mesh, name) for name in GEOMETRY_FIELDS if hasattr(mesh, name)}
+        self.refs = 1
+
+    def apply(self, mesh):
+        for name, value in self.fields.items():
+            setattr(mesh, name, value)
+        mesh.geometry = self
+
+
+class GeometryRegistry:
+    """
+    Geometry registry !
+    - Meshes are keyed by their source and generation parameters (key())
+    - acquire() hands out the geometry of a registered key (no parsing, no upload), register() adds a built mesh
+    - Buffers and vao are freed when the last mesh using them is deleted (release())
+    """
+
+    def __init__(self) -> None:
+        self.entries = {}  # key: Geometry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Geometry key of source / generation parameters (arrays, numbers, strings, tuples)
+        """
+
+        return MeshCache.key(*parts)
+
+    def acquire(self, key):
+        """
+        Shared geometry of key (one more reference) or None
+        """
+
+        geometry = self.entries.get(key)
+        if geometry is not None:
+            geometry.refs += 1
+        return geometry
+
+    def register(self, key, mesh):
+        """
+        Shares the uploaded data of a built mesh under key (the mesh holds the first reference)
+        """
+
+        geometry = Geometry(self, key, mesh)
+        self.entries[key] = geometry
+        mesh.geometry = geometry
+        return geometry
+
+    def release(self, geometry):
+        """
+        Drops a reference, frees the buffers, vao and LOD meshes with the last one
+        """
+
+        geometry.refs -= 1
+        if geometry.refs > 0:
+            return
+
+        del self.entries[geometry.key]
+        fields = geometry.fields
+        glDeleteBuffers(len(fields["buffers"]), [handler.buffer_ref for handler in fields["buffers"]])
+        glDeleteVertexArrays(1, [fields["vao_ref"]])
+        for _, mesh in fields["lods"]:
+            mesh.delete()
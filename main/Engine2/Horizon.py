@@ -0,0 +1,146 @@
+# This file rejects boxes hidden behind heightmap terrain (CPU horizon occlusion)
+import numpy as np
+from .Settings2 import *
+
+
+def box_angles(camera_x, camera_z, lows, highs):
+    """
+    Camera azimuth range and xz distance range of boxes
+
+    Returns:
+        first, last (np.ndarray): azimuth range (first <= last, radians, unwrapped around the box center)
+        near, far (np.ndarray): nearest / furthest xz distance (near = 0 when the camera is above / inside the box)
+    """
+
+    xs = np.stack((lows[:, 0], highs[:, 0], highs[:, 0], lows[:, 0]), axis=1) - camera_x
+    zs = np.stack((lows[:, 2], lows[:, 2], highs[:, 2], highs[:, 2]), axis=1) - camera_z
+
+    center = np.arctan2(zs.mean(axis=1), xs.mean(axis=1))
+    angles = center[:, None] + (np.arctan2(zs, xs) - center[:, None] + np.pi) % (2 * np.pi) - np.pi
+
+    near_x = np.maximum(np.maximum(lows[:, 0] - camera_x, camera_x - highs[:, 0]), 0)
+    near_z = np.maximum(np.maximum(lows[:, 2] - camera_z, camera_z - highs[:, 2]), 0)
+    return angles.min(axis=1), angles.max(axis=1), np.hypot(near_x, near_z), np.sqrt(xs ** 2 + zs ** 2).max(axis=1)
+
+
+class HorizonCuller:
+    """
+    Heightmap horizon occlusion
+    - The heightmap is split into cell x cell occluders (lowest column top, solid down to the world bottom)
+    - Every camera azimuth bin keeps the highest occluder elevation (height / distance) per distance ring,
+      accumulated outwards (horizon of everything up to the ring)
+    - A box is hidden when every bin it touches has a horizon above its highest point at its nearest ring
+    - Conservative: occluders only cover bins they span completely, boxes are tested against their worst case
+    """
+
+    def __init__(self, heightmap, origin=(-4, -4), cell=HORIZON_CELL, bins=HORIZON_BINS, ring=HORIZON_RING,
+                 distance=HORIZON_DISTANCE) -> None:
+        """
+        Args:
+            heightmap (np.ndarray): [X][Z] column heights (Shematic.terrain_shematic)
+            origin (tuple): world (x, z) of the heightmap [0][0] column low corner
+            cell (int): columns per occluder side
+            bins (int): camera azimuth bins
+            ring (float): distance ring width (blocks)
+            distance (float): occluders further than it are ignored
+        """
+
+        self.origin = origin
+        self.cell = cell
+        self.bins = bins
+        self.ring = ring
+        self.distance = distance
+        self.rings = int(np.ceil(distance / ring)) + 1
+        self.position = None
+        self.horizon = None  # (bins, rings) elevations
+        self.set_heightmap(heightmap)
+
+    def set_heightmap(self, heightmap):
+        """
+        Rebuilds the occluders (after terrain edits)
+        """
+
+        heights = np.asarray(heightmap, np.float64)
+        heights = np.trunc(heights.reshape(heights.shape[0], heights.shape[1]))
+        size_x = -(-heights.shape[0] // self.cell) * self.cell
+        size_z = -(-heights.shape[1] // self.cell) * self.cell
+
+        # Cells partly outside the heightmap don't occlude
+        padded = np.full((size_x, size_z), -np.inf)
+        padded[:heights.shape[0], :heights.shape[1]] = heights
+        tops = padded.reshape(size_x // self.cell, self.cell, size_z // self.cell, self.cell).min(axis=(1, 3))
+
+        cells_x, cells_z = np.nonzero(np.isfinite(tops))
+        self.tops = tops[cells_x, cells_z]
+        self.lows = np.stack((self.origin[0] + cells_x * self.cell, np.zeros(len(cells_x)),
+                              self.origin[1] + cells_z * self.cell), axis=1).astype(np.float64)
+        self.highs = self.lows + (self.cell, 0, self.cell)
+        self.position = None
+
+    def update(self, camera):
+        """
+        Rebuilds the horizon when the camera moved
+        """
+
+        position = np.array(camera.transformation[:3, 3], np.float64)
+        if self.position is not None and np.array_equal(position, self.position):
+            return
+        self.position = position
+        camera_x, camera_y, camera_z = position
+
+        first, last, near, far = box_angles(camera_x, camera_z, self.lows, self.highs)
+        height = self.tops - camera_y
+        elevation = np.where(height >= 0, height / np.maximum(far, 1e-9), height / np.maximum(near, 1e-9))
+
+        # Bins completely inside the occluder azimuth range
+        width = 2 * np.pi / self.bins
+        first_bin = np.ceil(first / width).astype(np.int64)
+        counts = np.floor(last / width).astype(np.int64) - first_bin
+        keep = (near > 0) & (far <= self.distance) & (counts > 0)
+        first_bin, counts, elevation = first_bin[keep], counts[keep], elevation[keep]
+        rings = np.ceil(far[keep] / self.ring).astype(np.int64)
+
+        cells = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(len(cells)) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.horizon = np.full((self.bins, self.rings), -np.inf)
+        np.maximum.at(self.horizon, ((first_bin[cells] + offsets) % self.bins, rings[cells]), elevation[cells])
+        self.horizon = np.maximum.accumulate(self.horizon, axis=1)
+
+    def visible_boxes(self, camera, lows, highs) -> np.ndarray:
+        """
+        Axis aligned boxes not hidden by the terrain (same output as Frustum.visible_boxes)
+
+        Args:
+            camera (Camera): camera (the horizon follows its position)
+            lows (np.ndarray): (n, 3) world box minimum corners
+            highs (np.ndarray): (n, 3) world box maximum corners
+
+        Returns:
+            np.ndarray: (n,) bool
+        """
+
+        lows = np.asarray(lows, np.float64).reshape(-1, 3)
+        highs = np.asarray(highs, np.float64).reshape(-1, 3)
+        if len(lows) == 0:
+            return np.zeros(0, bool)
+
+        self.update(camera)
+        camera_x, camera_y, camera_z = self.position
+        first, last, near, far = box_angles(camera_x, camera_z, lows, highs)
+        height = highs[:, 1] - camera_y
+        elevation = np.where(height >= 0, height / np.maximum(near, 1e-9), height / np.maximum(far, 1e-9))
+
+        # Every bin the box touches
+        width = 2 * np.pi / self.bins
+        first_bin = np.floor(first / width).astype(np.int64)
+        counts = np.floor(last / width).astype(np.int64) - first_bin + 1
+        testable = (near > 0) & (last - first < np.pi)
+        counts = np.where(testable, counts, 1)
+        rings = np.minimum(np.floor(near / self.ring).astype(np.int64), self.rings - 1)
+
+        boxes = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(len(boxes)) - np.repeat(np.cumsum(counts) - counts, counts)
+        horizon = self.horizon[(first_bin[boxes] + offsets) % self.bins, rings[boxes]]
+        lowest = np.minimum.reduceat(horizon, np.cumsum(counts) - counts)
+
+        return ~testable | (lowest <= elevation)
@@ -0,0 +1,77 @@
+# This file reads meshes from glTF / GLB files
+from .Mesh import *
+from .GLTFReader import GLTFFile
+
+
+class LoadGLTF(Mesh):
+    """
+    Reads a mesh primitive from a glTF 2.0 / GLB file (see GLTFReader.py)
+    - Buffers upload straight from the memory mapped file, indexed primitives keep their indices
+    - The embedded (or referenced) base color image is the texture unless imagefile is given
+    - load_all() reads every triangle primitive of a file (one mesh each, images shared)
+    """
+    def __init__(self, filename, imagefile=None, mesh=0, primitive=0, draw_type=GL_TRIANGLES,
+                 location=pygame.Vector3(0, 0, 0),
+                 rotation=Rotation(0, pygame.Vector3(0, 1, 0)),
+                 scale=pygame.Vector3(1, 1, 1),
+                 move_rotation=Rotation(0, pygame.Vector3(0, 1, 0)),
+                 move_translate=pygame.Vector3(0, 0, 0),
+                 move_scale=pygame.Vector3(1, 1, 1),
+                 material=None,
+                 memory_save=False,
+                 memory_save_chunk=False,
+                 distance_range=None,
+                 compact=False,
+                 textures=None,
+                 occlusion=None,
+                 spatial=None
+                 ):
+        """
+        filename: (str | GLTFFile): glTF / GLB file (an opened GLTFFile is shared)
+        mesh, primitive: (int): read primitive
+        textures: (dict): image index: Texture, shared by the primitives of a file (filled on use)
+        """
+        print("Loading Objects...")
+
+        self.gltf = filename if isinstance(filename, GLTFFile) else GLTFFile(filename)
+        vertices, vertex_normals, vertex_uvs, indices, image = self.gltf.primitive(mesh, primitive)
+
+        texture = None
+        if imagefile is None and image is not None:
+            textures = {} if textures is None else textures
+            if image not in textures:
+                textures[image] = Texture(surface=self.gltf.surface(image), flip=False)
+            texture = textures[image]
+
+        super().__init__(vertices,
+                         imagefile=imagefile,
+                         texture=texture,
+                         vertex_normals=vertex_normals,
+                         vertex_uvs=vertex_uvs,
+                         indices=indices,
+                         color=(1, 1, 1),
+                         compact=compact,
+                         draw_type=draw_type,
+                         translation=location,
+                         rotation=rotation,
+                         scale=scale,
+                         move_rotation=move_rotation,
+                         move_translate=move_translate,
+                         move_scale=move_scale,
+                         material=material,
+                         memory_save=memory_save,
+                         memory_save_chunk=memory_save_chunk,
+                         distance_range=distance_range,
+                         occlusion=occlusion,
+                         spatial=spatial)
+
+    @classmethod
+    def load_all(cls, filename, **kwargs):
+        """
+        Every triangle primitive of a file as a LoadGLTF (same keyword arguments for each)
+        """
+
+        gltf = GLTFFile(filename)
+        textures = kwargs.pop("textures", {})
+        return [cls(gltf, mesh=mesh, primitive=primitive, textures=textures, **kwargs)
+                for mesh, primitive in gltf.primitives()]
@@ -1,11 +1,21 @@
 # This file reads meshes from objs and processes them
+import os
 from .Mesh import *
 from .Utils import *
+from .Cache import MeshCache
+from .Simplify import simplify_chain, SIMPLIFY_VERSION
+from .ObjReader import read_obj
 
 
 class LoadObject(Mesh):
     """
     Reads mesh from obj
+    - lods: [(camera distance, obj file), ...] lower detail objs drawn from their distance on
+    - auto_lods: [(camera distance, triangle ratio), ...] simplified LODs (see Simplify.py), cached when cache is given
+    - model_cache: parsed objs are memory mapped from a Cache.ModelCache (parsed once per obj content)
+    - prepared: prepare() output (worker thread parsing / simplifying), only GL objects are created here
+    - registry: objects of the same obj / parameters / material share one upload (Geometry.GeometryRegistry),
+      only the first one parses and uploads
     """
     def __init__(self, filename, imagefile, draw_type=GL_TRIANGLES,
                  location=pygame.Vector3(0, 0, 0),
@@ -17,27 +27,43 @@ class LoadObject(Mesh):
                  material=None,
                  memory_save=False,
                  memory_save_chunk=False,
-                 distance_range=12
+                 distance_range=None,
+                 indexed=False,
+                 compact=False,
+                 lods=None,
+                 auto_lods=None,
+                 keep_seams=True,
+                 cache=None,
+                 occlusion=None,
+                 spatial=None,
+                 model_cache=None,
+                 prepared=None,
+                 registry=None
                  ):
         print("Loading Objects...")
+
+        # Shared upload of an already loaded object (vertex attribute locations depend on the material)
+        key = geometry = None
+        if registry is not None:
+            key = registry.key("obj", os.path.abspath(filename), indexed, compact, tuple(lods or ()), tuple(auto_lods or ()),
+                               keep_seams, material.program_id)
+            geometry = registry.acquire(key)
         
         # Mesh sections
-        coordinates, triangles, uvs, uvs_ind, normals, normal_ind = self.load_drawing(filename)
-        vertices = format_vertices(coordinates, triangles)
-        vertex_normals = format_vertices(normals, normal_ind)
-        vertex_uvs = format_vertices(uvs, uvs_ind)
-        colors = []
-        
-        for i in range(len(vertices)):
-            colors.append(1)
-            colors.append(1)
-            colors.append(1)
+        vertices = vertex_normals = vertex_uvs = indices = None
+        if geometry is None:
+            if prepared is None:
+                prepared = {"arrays": self.load_arrays(filename, indexed, model_cache), "lod_chain": None}
+            vertices, vertex_normals, vertex_uvs, indices = prepared["arrays"]
             
         super().__init__(vertices,
                          imagefile=imagefile,
                          vertex_normals=vertex_normals,
                          vertex_uvs=vertex_uvs,
-                         vertex_colors=colors,
+                         indices=indices,
+                         color=(1, 1, 1),
+                         indexed=indexed,
+                         compact=compact,
                          draw_type=draw_type,
                          translation=location,
                          rotation=rotation,
@@ -48,41 +74,136 @@ class LoadObject(Mesh):
                          material=material,
                          memory_save=memory_save,
                          memory_save_chunk=memory_save_chunk,
-                         distance_range=distance_range)
-
-    def load_drawing(self, filename):
-        vertices = []
-        triangles = []
-        normals = []
-        normal_ind = []
-        uvs = []
-        uvs_ind = []
-        with open(filename) as fp:
-            line = fp.readline()
-            while line:
-                try:
-                    if line[:2] == "v ":
-                        vx, vy, vz = [float(value) for value in line[2:].split()]
-                        vertices.append((vx, vy, vz))
-                    if line[:2] == "vn":
-                        vx, vy, vz = [float(value) for value in line[3:].split()]
-                        normals.append((vx, vy, vz))
-                    if line[:2] == "vt":
-                        vx, vy = [float(value) for value in line[3:].split()]
-                        uvs.append((vx, vy))
-                    if line[:2] == "f ":
-                        t1, t2, t3 = [value for value in line[2:].split()]
-                        triangles.append([int(value) for value in t1.split('/')][0]-1)
-                        triangles.append([int(value) for value in t2.split('/')][0]-1)
-                        triangles.append([int(value) for value in t3.split('/')][0]-1)
-                        uvs_ind.append([int(value) for value in t1.split('/')][1] - 1)
-                        uvs_ind.append([int(value) for value in t2.split('/')][1] - 1)
-                        uvs_ind.append([int(value) for value in t3.split('/')][1] - 1)
-                        normal_ind.append([int(value) for value in t1.split('/')][2] - 1)
-                        normal_ind.append([int(value) for value in t2.split('/')][2] - 1)
-                        normal_ind.append([int(value) for value in t3.split('/')][2] - 1)
-                except:
-                    print("READING OBJ ERROR")
-                line = fp.readline()
-
-        return vertices, triangles, uvs, uvs_ind, normals, normal_ind
+                         distance_range=distance_range,
+                         occlusion=occlusion,
+                         spatial=spatial,
+                         geometry=geometry)
+
+        if geometry is not None:
+            return
+
+        for distance, lod_filename in lods or []:
+            self.load_lod(distance, lod_filename, indexed=indexed, compact=compact, model_cache=model_cache)
+
+        if auto_lods:
+            self.load_auto_lods(filename, vertices, vertex_normals, vertex_uvs, auto_lods, keep_seams, cache, compact,
+                                indices=indices, chain=prepared["lod_chain"])
+
+        if registry is not None:
+            registry.register(key, self)
+
+    @classmethod
+    def prepare(cls, filename, indexed=False, model_cache=None, auto_lods=None, keep_seams=True, cache=None):
+        """
+        CPU side of a LoadObject (no GL calls, runs on worker threads), passed to LoadObject as prepared
+
+        Returns:
+            dict: arrays (load_arrays() output), lod_chain (auto_lod_chain() output, None without auto_lods)
+        """
+
+        arrays = cls.load_arrays(filename, indexed, model_cache)
+        chain = None
+        if auto_lods:
+            chain = cls.auto_lod_chain(filename, *arrays[:3], auto_lods, keep_seams, cache, indices=arrays[3])
+        return {"arrays": arrays, "lod_chain": chain}
+
+    @classmethod
+    def load_arrays(cls, filename, indexed=False, model_cache=None):
+        """
+        Upload ready arrays of an obj: vertices, vertex normals, vertex uvs, indices (None unless indexed)
+        - indexed: arrays are welded (see Utils.weld_vertices)
+        - model_cache: arrays are memory mapped from the cache, the obj is only parsed on a miss
+        """
+
+        variant = "indexed" if indexed else "formatted"
+        arrays = model_cache.load(filename, variant) if model_cache is not None else None
+        if arrays is None:
+            coordinates, triangles, uvs, uvs_ind, normals, normal_ind = cls.load_drawing(filename)
+            arrays = {"vertices": format_vertices(coordinates, triangles),
+                      "normals": format_vertices(normals, normal_ind),
+                      "uvs": format_vertices(uvs, uvs_ind)}
+            if indexed:
+                (arrays["vertices"], arrays["normals"], arrays["uvs"]), arrays["indices"] = weld_vertices(
+                    arrays["vertices"], arrays["normals"], arrays["uvs"])
+            if model_cache is not None:
+                arrays = model_cache.save(filename, variant, **arrays)
+
+        return arrays["vertices"], arrays["normals"], arrays["uvs"], arrays.get("indices")
+
+    def load_auto_lods(self, filename, vertices, vertex_normals, vertex_uvs, auto_lods, keep_seams=True, cache=None, compact=False,
+                       indices=None, chain=None):
+        """
+        Registers simplified LODs (indexed), baked once per obj content / ratios when cached
+        - indices: vertices are welded (expanded again when simplified)
+        - chain: already simplified LODs (auto_lod_chain() output)
+        """
+
+        auto_lods = sorted(auto_lods, key=lambda lod: lod[0])
+        if chain is None:
+            chain = self.auto_lod_chain(filename, vertices, vertex_normals, vertex_uvs, auto_lods, keep_seams, cache, indices)
+
+        for (distance, _), (l_vertices, l_normals, l_uvs, l_indices) in zip(auto_lods, chain):
+            self.add_lod(distance, Mesh(l_vertices,
+                                        vertex_normals=l_normals,
+                                        vertex_uvs=l_uvs,
+                                        indices=l_indices,
+                                        color=(1, 1, 1),
+                                        compact=compact,
+                                        draw_type=self.draw_type,
+                                        material=self.material))
+
+    @staticmethod
+    def auto_lod_chain(filename, vertices, vertex_normals, vertex_uvs, auto_lods, keep_seams=True, cache=None, indices=None):
+        """
+        Simplified LOD arrays of auto_lods, nearest first (Simplify.simplify_chain(), no GL calls)
+        """
+
+        ratios = tuple(ratio for _, ratio in sorted(auto_lods, key=lambda lod: lod[0]))
+        chain = None
+
+        if cache is not None:
+            with open(filename, "rb") as obj_file:
+                content = np.frombuffer(obj_file.read(), np.uint8)
+            key = MeshCache.key(SIMPLIFY_VERSION, content, ratios, keep_seams)
+            entry = cache.load(key)
+            if entry is not None:
+                chain = [(entry[f"vertices_{i}"], entry[f"normals_{i}"], entry[f"uvs_{i}"], entry[f"indices_{i}"])
+                         for i in range(len(ratios))]
+
+        if chain is None:
+            print("Simplifying Object...")
+            if indices is not None:
+                vertices, vertex_normals, vertex_uvs = vertices[indices], vertex_normals[indices], vertex_uvs[indices]
+            chain = simplify_chain(vertices, vertex_normals, vertex_uvs, ratios, keep_seams)
+            if cache is not None:
+                arrays = {}
+                for i, (l_vertices, l_normals, l_uvs, l_indices) in enumerate(chain):
+                    arrays.update({f"vertices_{i}": l_vertices, f"normals_{i}": l_normals,
+                                   f"uvs_{i}": l_uvs, f"indices_{i}": l_indices})
+                cache.save(key, **arrays)
+
+        return chain
+
+    def load_lod(self, distance, filename, indexed=False, compact=False, model_cache=None):
+        """
+        Registers a lower detail obj as the LOD drawn from distance on
+        """
+
+        vertices, vertex_normals, vertex_uvs, indices = self.load_arrays(filename, indexed, model_cache)
+        self.add_lod(distance, Mesh(vertices,
+                                    vertex_normals=vertex_normals,
+                                    vertex_uvs=vertex_uvs,
+                                    indices=indices,
+                                    color=(1, 1, 1),
+                                    indexed=indexed,
+                                    compact=compact,
+                                    draw_type=self.draw_type,
+                                    material=self.material))
+
+    @staticmethod
+    def load_drawing(filename):
+        """
+        Obj attribute tables and triangle corner indices (see ObjReader.read_obj)
+        """
+
+        return read_obj(filename)
@@ -1,18 +1,43 @@
+import ctypes
 from .DataHandler import *
 from .Uniform import *
 from .Transformations import *
 from .Texture import *
+from .Settings2 import *
+from .Utils import weld_vertices
+from .VertexLayout import compact_layout
+from .Frustum import transform_boxes
 
 
 class Mesh:
     """
     Mesh Loader
+    - indexed: welds equal vertices into an element buffer (glDrawElements)
+    - instance_offsets: draws the mesh once per offset in one call (instanced shader only)
+    - dynamic: buffers are patched in place (attributes[name].update()), vertex_count sets the drawn vertices
+    - compact: one interleaved buffer of quantized attributes (see VertexLayout.compact_layout), static only
+    - color: constant vertex color instead of a per vertex color buffer
+    - draw_ranges: (firsts, counts) vertex ranges drawn with one multi draw call (None: everything)
+    - LOD: add_lod() meshes are drawn instead from their camera distance on, nothing is drawn beyond distance_range
+    - occlusion: nothing is drawn while the mesh bounding box is hidden by the terrain (Horizon.HorizonCuller)
+    - spatial: the mesh world box is kept in a Spatial.SpatialIndex, indexed meshes are moved by update() (call it
+      every frame, drawing doesn't move them: meshes outside the queried frustum keep moving)
+    - imagefile: image file or an already loaded Texture (shared)
+    - geometry: uploaded data shared with other meshes (Geometry.GeometryRegistry.acquire(), vertices unused)
     """
     def __init__(self, vertices,
                  imagefile=None,
                  vertex_normals=None,
                  vertex_uvs=None,
                  vertex_colors=None,
+                 vertex_tiles=None,
+                 indices=None,
+                 indexed=False,
+                 texture=None,
+                 instance_offsets=None,
+                 dynamic=False,
+                 compact=False,
+                 color=None,
                  draw_type=GL_TRIANGLES,
                  translation=pygame.Vector3(0, 0, 0),
                  rotation=Rotation(0, pygame.Vector3(0, 1, 0)),
@@ -23,39 +48,108 @@ class Mesh:
                  material=None,
                  memory_save=True,
                  memory_save_chunk=False,
-                 distance_range=12
+                 distance_range=None,
+                 occlusion=None,
+                 spatial=None,
+                 geometry=None
                  ):
         print("Building Mesh...")
-        
+
+        if indexed and indices is None and vertices is not None:
+            (vertices, vertex_normals, vertex_uvs, vertex_colors, vertex_tiles), indices = weld_vertices(
+                vertices, vertex_normals, vertex_uvs, vertex_colors, vertex_tiles)
+
         self.position = translation
         self.material= material
         self.vertices = vertices
         self.vertex_normals = vertex_normals
         self.vertex_uvs = vertex_uvs
+        self.indices = indices
+        self.instance_offsets = instance_offsets
+        self.vertex_count = len(vertices) if vertices is not None else 0
+        self.layout = None
+        self.position_decode = (0.0, 0.0, 0.0, 1.0)  # origin x, y, z, scale of compact positions
+        self.color = color
+        self.draw_ranges = None
         self.draw_type = draw_type
         self.memory_save = memory_save
         self.memory_save_chunk = memory_save_chunk
-        self.distance_range = distance_range
+        self.distance_range = distance_range  # no draw beyond it (None: always drawn)
+        self.lods = []  # (camera distance, Mesh), nearest first
+        self.lod_level = 0  # 0: this mesh, i: self.lods[i - 1]
+        self.occlusion = occlusion
+        self.center = np.zeros(3, np.float32)
+        self.bounds = None  # model space (low, high) corners, every instance included
+        if vertices is not None and len(vertices):
+            bounds = np.asarray(vertices, np.float32).reshape(-1, 3)
+            self.center = (bounds.min(axis=0) + bounds.max(axis=0)) / 2
+            self.bounds = bounds.min(axis=0), bounds.max(axis=0)
+            if instance_offsets is not None and len(instance_offsets):
+                offsets = np.asarray(instance_offsets, np.float32).reshape(-1, 3)
+                self.bounds = self.bounds[0] + offsets.min(axis=0), self.bounds[1] + offsets.max(axis=0)
         
-        self.vao_ref = glGenVertexArrays(1)
-        glBindVertexArray(self.vao_ref)
+        self.geometry = None  # shared uploaded data (Geometry.GeometryRegistry), None: own buffers
+        if geometry is not None:
+            geometry.apply(self)
+        else:
+            self.vao_ref = glGenVertexArrays(1)
+            glBindVertexArray(self.vao_ref)
+            self.buffers = []
+            self.attributes = {}  # shader variable: DataHandler
+            usage = GL_DYNAMIC_DRAW if dynamic else GL_STATIC_DRAW
         
-        # Construction of mesh sections if there are any
-        if vertices is not None:
-            position = DataHandler("vec3", self.vertices)
-            position.create_variable(self.material.program_id, "position")
+            # Construction of mesh sections if there are any
+            if compact and vertices is not None and not dynamic:
+                self.layout, self.position_decode = compact_layout(vertices, vertex_normals, vertex_uvs, vertex_tiles)
+                origin = np.array(self.position_decode[:3], np.float32)
+                local = (np.asarray(vertices, np.float32).reshape(-1, 3) - origin) / self.position_decode[3]
+                packed = self.layout.pack(position=local, vertex_normal=vertex_normals, vertex_uv=vertex_uvs, vertex_tile=vertex_tiles)
+                interleaved = DataHandler("interleaved", packed, usage, layout=self.layout)
+                interleaved.create_variable(self.material.program_id, None)
+                self.buffers.append(interleaved)
+                self.attributes["interleaved"] = interleaved
+            else:
+                if vertices is not None:
+                    position = DataHandler("vec3", self.vertices, usage)
+                    position.create_variable(self.material.program_id, "position")
+                    self.buffers.append(position)
+                    self.attributes["position"] = position
             
-        if vertex_colors is not None:
-            colors = DataHandler("vec3", vertex_colors)
-            colors.create_variable(self.material.program_id, "vertex_color")
-
-        if vertex_normals is not None:
-            v_normals = DataHandler("vec3", vertex_normals)
-            v_normals.create_variable(self.material.program_id, "vertex_normal")
+                if vertex_normals is not None:
+                    v_normals = DataHandler("vec3", vertex_normals, usage)
+                    v_normals.create_variable(self.material.program_id, "vertex_normal")
+                    self.buffers.append(v_normals)
+                    self.attributes["vertex_normal"] = v_normals
             
-        if vertex_uvs is not None:
-            v_uvs = DataHandler("vec2", vertex_uvs)
-            v_uvs.create_variable(self.material.program_id, "vertex_uv")
+                if vertex_uvs is not None:
+                    v_uvs = DataHandler("vec2", vertex_uvs, usage)
+                    v_uvs.create_variable(self.material.program_id, "vertex_uv")
+                    self.buffers.append(v_uvs)
+                    self.attributes["vertex_uv"] = v_uvs
+
+                # Atlas tiles of greedy meshes (atlas shader only)
+                if vertex_tiles is not None:
+                    v_tiles = DataHandler("vec4", vertex_tiles, usage)
+                    v_tiles.create_variable(self.material.program_id, "vertex_tile")
+                    self.buffers.append(v_tiles)
+                    self.attributes["vertex_tile"] = v_tiles
+
+            if vertex_colors is not None:
+                colors = DataHandler("vec3", vertex_colors, usage)
+                colors.create_variable(self.material.program_id, "vertex_color")
+                self.buffers.append(colors)
+                self.attributes["vertex_color"] = colors
+
+            # Per instance offsets (instanced shader only)
+            if instance_offsets is not None:
+                offsets = DataHandler("vec3", instance_offsets)
+                offsets.create_variable(self.material.program_id, "instance_offset", divisor=1)
+                self.buffers.append(offsets)
+
+            # Element buffer (bound to the vao)
+            if indices is not None:
+                self.element_buffer = DataHandler("index", indices)
+                self.buffers.append(self.element_buffer)
             
         self.transformation_mat = identity_mat()
         self.transformation_mat = rotateA(self.transformation_mat, rotation.angle, rotation.axis)
@@ -66,35 +160,184 @@ class Mesh:
         self.move_rotation = move_rotation
         self.move_translate = move_translate
         self.move_scale = move_scale
+        self.decode = Uniform("vec4", self.position_decode)
+        self.color_id = glGetAttribLocation(self.material.program_id, "vertex_color") if color is not None else -1
         self.texture = None
         
-        if imagefile is not None:
+        if texture is None and isinstance(imagefile, Texture):
+            texture = imagefile
+
+        if texture is not None:
+            # Shared (already loaded) texture
+            self.image = texture
+            self.texture = Uniform("sampler2D", [self.image.texture_id, 1])
+        elif imagefile is not None:
             self.image = Texture(imagefile)
             self.texture = Uniform("sampler2D", [self.image.texture_id, 1])
 
-    def draw_force(self, camera, light, draw_type_force=None):
+        self.spatial = spatial
+        self.spatial_mat = None  # transformation of the registered box
+        self.update_spatial()
+
+    def world_box(self):
+        """
+        World axis aligned box (low, high) of the mesh, None without vertices
+        """
+
+        if self.bounds is None:
+            return None
+        lows, highs = transform_boxes(*self.bounds, self.transformation_mat)
+        return lows[0], highs[0]
+
+    def update_spatial(self):
+        """
+        Registers / moves the mesh in its spatial index when the transformation changed
+        """
+
+        if self.spatial is None or self.bounds is None or np.array_equal(self.spatial_mat, self.transformation_mat):
+            return
+
+        if self in self.spatial:
+            self.spatial.update(self, *self.world_box())
+        else:
+            self.spatial.insert(self, *self.world_box())
+        self.spatial_mat = self.transformation_mat.copy()
+
+    def update(self):
+        """
+        Applies one frame of move_rotation / move_translate / move_scale, moves the spatial index box
+        """
+
+        self.transformation_mat = rotateA(self.transformation_mat, self.move_rotation.angle, self.move_rotation.axis)
+        self.transformation_mat = translate(self.transformation_mat,
+                                            self.move_translate.x, self.move_translate.y, self.move_translate.z)
+        self.transformation_mat = scale3(
+            self.transformation_mat, self.move_scale.x, self.move_scale.y, self.move_scale.z)
+        self.update_spatial()
+
+    def bind_program(self, camera, light):
+        """
+        Uses the material and loads its camera / light uniforms (shared by meshes of the same material)
+        """
+
         self.material.use()
         camera.update(self.material.program_id)
         light.update(self.material.program_id)
-        
+
+    def draw_force(self, camera, light, draw_type_force=None):
+        self.bind_program(camera, light)
+        self.draw_bound(camera, draw_type_force)
+
+    def draw_bound(self, camera, draw_type_force=None):
+        """
+        Draws the mesh with the program bound by bind_program() (of this or a mesh with the same material)
+        """
+
+        if self.spatial is None:
+            self.update()
+
+        mesh = self.select_lod(camera)
+        if mesh is None or self.occluded(camera):
+            return
+
         if self.texture is not None:
             self.texture.find_variable(self.material.program_id, "tex")
             self.texture.load()
-        
-        self.transformation_mat = rotateA(self.transformation_mat, self.move_rotation.angle, self.move_rotation.axis)
-        self.transformation_mat = translate(self.transformation_mat,
-                                            self.move_translate.x, self.move_translate.y, self.move_translate.z)
-        self.transformation_mat = scale3(
-            self.transformation_mat, self.move_scale.x, self.move_scale.y, self.move_scale.z)
+
         self.transformation = Uniform("mat4", self.transformation_mat)
         self.transformation.find_variable(self.material.program_id, "model_mat")
         self.transformation.load()
+        mesh.decode.find_variable(self.material.program_id, "position_decode")
+        mesh.decode.load()
 
-        glBindVertexArray(self.vao_ref)
+        glBindVertexArray(mesh.vao_ref)
+        if mesh.color_id >= 0:
+            # Constant attribute (vertex_color array stays disabled)
+            glVertexAttrib3f(mesh.color_id, mesh.color[0], mesh.color[1], mesh.color[2])
         
         if draw_type_force:
-            glDrawArrays(draw_type_force, 0, len(self.vertices))
-        glDrawArrays(self.draw_type, 0, len(self.vertices))
+            mesh.draw_call(draw_type_force)
+        mesh.draw_call(self.draw_type)
+
+    def add_lod(self, distance, mesh):
+        """
+        Draws mesh (same material, drawn with this mesh transformation and texture) from distance on
+        """
+
+        self.lods.append((distance, mesh))
+        self.lods.sort(key=lambda lod: lod[0])
+
+    def select_lod(self, camera):
+        """
+        Mesh to draw for the camera distance (LOD switches with MESH_LOD_HYSTERESIS), None beyond distance_range
+        """
+
+        if self.distance_range is None and not self.lods:
+            return self
+
+        center = self.transformation_mat @ np.append(self.center, 1)
+        distance = np.linalg.norm(center[:3] - camera.transformation[:3, 3])
+        if self.distance_range is not None and distance > self.distance_range:
+            return None
+
+        level = min(self.lod_level, len(self.lods))
+        while level < len(self.lods) and distance > self.lods[level][0] * (1 + MESH_LOD_HYSTERESIS):
+            level += 1
+        while level > 0 and distance < self.lods[level - 1][0] * (1 - MESH_LOD_HYSTERESIS):
+            level -= 1
+
+        self.lod_level = level
+        return self if level == 0 else self.lods[level - 1][1]
+
+    def occluded(self, camera):
+        """
+        Bounding box hidden by the occlusion culler
+        """
+
+        if self.occlusion is None or self.bounds is None:
+            return False
+
+        return not self.occlusion.visible_boxes(camera, *self.world_box())[0]
+
+    def draw_call(self, draw_type):
+        if self.draw_ranges is not None:
+            firsts, counts = self.draw_ranges
+            if len(counts) == 0:
+                return
+            if self.indices is not None:
+                offsets = (ctypes.c_void_p * len(firsts))(*(int(first) * 4 for first in firsts))
+                glMultiDrawElements(draw_type, counts, GL_UNSIGNED_INT, offsets, len(counts))
+            else:
+                glMultiDrawArrays(draw_type, firsts, counts, len(counts))
+        elif self.instance_offsets is not None:
+            if self.indices is not None:
+                glDrawElementsInstanced(draw_type, len(self.indices), GL_UNSIGNED_INT, None, len(self.instance_offsets))
+            else:
+                glDrawArraysInstanced(draw_type, 0, len(self.vertices), len(self.instance_offsets))
+        elif self.indices is not None:
+            glDrawElements(draw_type, len(self.indices), GL_UNSIGNED_INT, None)
+        else:
+            glDrawArrays(draw_type, 0, self.vertex_count)
+
+    def delete(self):
+        """
+        Frees the mesh buffers and vao (shared textures are kept, shared geometry is released)
+        """
+
+        if self.geometry is not None:
+            self.geometry.registry.release(self.geometry)
+            self.geometry = None
+        else:
+            glDeleteBuffers(len(self.buffers), [handler.buffer_ref for handler in self.buffers])
+            glDeleteVertexArrays(1, [self.vao_ref])
+            for _, mesh in self.lods:
+                mesh.delete()
+        self.buffers = []
+        self.attributes = {}
+        self.lods = []
+
+        if self.spatial is not None and self in self.spatial:
+            self.spatial.remove(self)
 
     def draw(self, camera, light):
         """
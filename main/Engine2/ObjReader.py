@@ -0,0 +1,206 @@
+# This file reads Wavefront obj files (statement lines grouped by prefix, numpy parsing of every group)
+import io
+import re
+import numpy as np
+
+# Statement prefixes the reader uses, other lines (comments, groups, materials) are skipped
+OBJ_PREFIXES = {"v": b"v", "vt": b"vt", "vn": b"vn", "f": b"f"}
+OBJ_WIDTHS = {"v": 3, "vt": 2, "vn": 3}
+OBJ_COMMENTS = re.compile(rb"#[^\n]*")
+OBJ_VECTOR_BYTES = 16384  # smaller files are read line by line (numpy call overhead)
+
+# Statement bytes: bytes up to " " separate tokens
+SPACE, SLASH = np.uint8(ord(" ")), np.uint8(ord("/"))
+
+
+def read_faces(text, lines):
+    """
+    Face corners of lines face statements (prefixes removed) with the same corner count and form
+    ("v", "v/vt", "v//vn" or "v/vt/vn")
+
+    Returns:
+        corners (np.ndarray), size (int): read_lines() corners (missing indices: 0) and corners per face,
+        None for other faces
+    """
+
+    text = text.replace(b"//", b"/0/")
+    data = np.frombuffer(text, np.uint8)
+    separator = data <= SPACE
+    token_starts = np.flatnonzero(~separator & np.concatenate(([True], separator[:-1])))
+    if not len(token_starts):
+        return None
+
+    # Slashes of every corner
+    slashes = np.add.reduceat(data == SLASH, token_starts, dtype=np.int64)
+    size = len(token_starts) // lines
+    if size * lines != len(token_starts) or slashes[0] > 2 or (slashes != slashes[0]).any():
+        return None
+
+    width = slashes[0] + 1
+    try:
+        values = np.loadtxt(io.BytesIO(text.replace(b"/", b" ")), np.int64, ndmin=2)
+    except ValueError:
+        return None
+    if values.shape != (lines, size * width):
+        # Empty components ("1/2/")
+        return None
+
+    corners = np.zeros((lines * size, 3), np.int64)
+    corners[:, :width] = values.reshape(-1, width)
+    return corners, size
+
+
+def read_numbers(raw):
+    """
+    Vectorized statement reader: runs of lines with the same prefix are parsed by one np.loadtxt() call,
+    read_lines() layout
+
+    Returns:
+        tables, corners, sizes, read: see read_lines(), None when a face run has mixed corner counts / forms or a
+        statement misses numbers
+    """
+
+    # Statement code of every line (0: skipped, 1 - 4: OBJ_PREFIXES, the prefix is followed by a space)
+    data = np.frombuffer(raw + b"\n" * 3, np.uint8)
+    line_starts = np.concatenate(([0], np.flatnonzero(data[:len(raw)] == 10) + 1))
+    heads = [data[line_starts + i] for i in range(3)]
+    codes = np.zeros(len(line_starts), np.int8)
+    for code, prefix in enumerate(OBJ_PREFIXES.values(), 1):
+        selected = heads[len(prefix)] <= SPACE
+        for head, byte in zip(heads, prefix):
+            selected &= head == byte
+        codes[selected] = code
+
+    # Skipped lines (comments, groups, smoothing groups) are dropped: statement runs stay whole
+    statement = codes > 0
+    lengths = np.diff(np.append(line_starts, len(raw)))
+    if not statement.all():
+        raw = data[:len(raw)][np.repeat(statement, lengths)].tobytes()
+        codes, lengths = codes[statement], lengths[statement]
+
+    # Runs of lines with the same code
+    firsts = np.flatnonzero(np.diff(codes, prepend=-1))
+    lasts = np.append(firsts[1:], len(codes))
+    ends = np.concatenate(([0], np.cumsum(lengths))).tolist()
+
+    rows = {kind: [] for kind in OBJ_WIDTHS}
+    counts = dict.fromkeys(OBJ_WIDTHS, 0)
+    corners, sizes, read = [], [], []
+    for first, last in zip(firsts.tolist(), lasts.tolist()):
+        code = codes[first]
+        kind = list(OBJ_PREFIXES)[code - 1]
+        text = raw[ends[first]:ends[last]]
+        if kind in OBJ_WIDTHS:
+            width = OBJ_WIDTHS[kind]
+            try:
+                # Extra components (like w) are dropped
+                values = np.loadtxt(io.BytesIO(text), np.float32, usecols=range(1, width + 1), ndmin=2)
+            except ValueError:
+                return None
+            rows[kind].append(values)
+            counts[kind] += len(values)
+        else:
+            faces = read_faces((b"\n" + text).replace(b"\nf", b"\n"), last - first)
+            if faces is None:
+                return None
+            corners.append(faces[0])
+            sizes.append(np.full(last - first, faces[1], np.int64))
+            read.append(np.repeat([list(counts.values())], last - first, axis=0))
+
+    tables = {kind: np.concatenate(values) if values else np.zeros((0, OBJ_WIDTHS[kind]), np.float32)
+              for kind, values in rows.items()}
+    corners = np.concatenate(corners) if corners else np.zeros((0, 3), np.int64)
+    sizes = np.concatenate(sizes) if sizes else np.zeros(0, np.int64)
+    read = np.concatenate(read) if (corners < 0).any() else None
+    return tables, corners, sizes, read
+
+
+def read_lines(raw):
+    """
+    Line by line statement reader (small files, number forms read_numbers() doesn't take), read_numbers() layout
+    """
+
+    rows = {kind: [] for kind in OBJ_WIDTHS}
+    corners, sizes, read = [], [], []
+    negative = False
+    for line in raw.split(b"\n"):
+        parts = line.split()
+        if not parts or line[:1].isspace():
+            continue
+
+        kind = parts[0].decode(errors="replace")
+        if kind in OBJ_WIDTHS:
+            width = OBJ_WIDTHS[kind]
+            if len(parts) <= width:
+                raise ValueError(f"Unreadable obj statement: {line!r}")
+            rows[kind] += parts[1:width + 1]
+        elif kind == "f":
+            for corner in parts[1:]:
+                indices = [int(value) if value else 0 for value in corner.split(b"/")]
+                if len(indices) > 3:
+                    raise ValueError(f"Unreadable obj face corner: {corner!r}")
+                negative = negative or min(indices) < 0
+                corners.append(indices + [0] * (3 - len(indices)))
+            sizes.append(len(parts) - 1)
+            read.append([len(rows[kind]) // width for kind, width in OBJ_WIDTHS.items()])
+
+    tables = {kind: np.array(values, np.float32).reshape(-1, OBJ_WIDTHS[kind]) for kind, values in rows.items()}
+    read = np.array(read, np.int64) if negative else None
+    return tables, np.array(corners, np.int64).reshape(-1, 3), np.array(sizes, np.int64), read
+
+
+def read_obj(filename):
+    """
+    Reads an obj file
+    - Triangles, quads and n-gons (fan triangulated)
+    - Negative (relative) indices
+    - Faces without uvs get (0, 0), faces without normals get their flat triangle normal
+
+    Returns:
+        vertices (np.ndarray), triangles (np.ndarray), uvs, uvs_ind, normals, normal_ind:
+        attribute tables and 0 based triangle corner indices (LoadObject.load_drawing() layout)
+    """
+
+    with open(filename, "rb") as obj_file:
+        raw = obj_file.read()
+
+    result = None
+    if len(raw) >= OBJ_VECTOR_BYTES:
+        result = read_numbers(raw)
+        if result is None and b"#" in raw:
+            # Comments after statements
+            raw = OBJ_COMMENTS.sub(b"", raw)
+            result = read_numbers(raw)
+    if result is None:
+        result = read_lines(OBJ_COMMENTS.sub(b"", raw) if b"#" in raw else raw)
+    tables, corners, sizes, read = result
+    vertices, uvs, normals = tables["v"], tables["vt"], tables["vn"]
+
+    # 0 based indices: positive - 1 (missing: -1), negative: relative to the elements read before the face
+    indices = corners - 1
+    if read is not None:
+        indices = np.where(corners < 0, np.repeat(read, sizes, axis=0) + corners, indices)
+
+    # Fan triangulation: (0, i, i + 1) of every face (faces below 3 corners are dropped)
+    if (sizes == 3).all():
+        triangles, uvs_ind, normal_ind = indices.T.copy()
+    else:
+        fans = np.maximum(sizes - 2, 0)
+        first = np.repeat(np.cumsum(sizes) - sizes, fans)
+        steps = np.arange(fans.sum()) - np.repeat(np.cumsum(fans) - fans, fans)
+        fan = np.stack((first, first + steps + 1, first + steps + 2), axis=-1).ravel()
+        triangles, uvs_ind, normal_ind = indices[fan].T.copy()
+
+    if (uvs_ind < 0).any():
+        uvs_ind[uvs_ind < 0] = len(uvs)
+        uvs = np.concatenate([uvs, np.zeros((1, 2), np.float32)])
+
+    if (normal_ind < 0).any():
+        corners = vertices[triangles].reshape(-1, 3, 3)
+        flat = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        flat /= np.maximum(np.linalg.norm(flat, axis=1, keepdims=True), 1e-20)
+        flat_ind = len(normals) + np.repeat(np.arange(len(flat)), 3)
+        normal_ind = np.where(normal_ind < 0, flat_ind, normal_ind)
+        normals = np.concatenate([normals, flat.astype(np.float32)])
+
+    return vertices, triangles, uvs, uvs_ind, normals, normal_ind
@@ -44,6 +44,14 @@ class Screen:
 
         pygame.display.set_caption(f"FPS: {fps} {SCREEN_CAPTION}")
 
+    def loading_progress(self, done, total, name):
+        """
+        Loading caption of the asset loader (AssetLoader progress), keeps the window responsive
+        """
+
+        pygame.display.set_caption(f"{SCREEN_CAPTION_LOADING} {done}/{total} ({name})")
+        pygame.event.pump()
+
     def engine_shutdown(self):
         """
         Shots the engine down
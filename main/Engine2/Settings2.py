@@ -19,7 +19,7 @@ CHUNK_COLOR_B = 1
 # Camera settings
 CAMERA_MOUSE_SENSITIVITY_X = 0.1
 CAMERA_MOUSE_SENSITIVITY_Y = 0.1
-CAMERA_MOVE_SENSITIVITY = 0.21
+CAMERA_MOVE_SENSITIVITY = 1.89  # one Camera.move() per frame (was 0.21 per drawn mesh, 9 meshes)
 CAMERA_VIEW_ANGLE = 60
 CAMERA_NEAR_PLANE = 0.01
 CAMERA_FAR_PLANE = 10000
@@ -45,3 +45,44 @@ SCREEN_DEPTH_SIZE = 24
 SCREEN_CAPTION_LOADING = "Loading..."
 SCREEN_CAPTION = "Float Arts Engine - V [Any]"
 SCREEN_MAX_FPS = 60  # 0 To max
+
+# Chunk streaming settings
+STREAM_RENDER_RADIUS = 6  # chunks
+STREAM_CACHE_CHUNKS = 256  # uploaded chunks kept before LRU eviction
+STREAM_UPLOAD_BUDGET = 2  # chunks built & uploaded per frame
+
+# Cache settings
+CACHE_FOLDER = "Cache"  # generated mesh cache
+MODEL_CACHE_FOLDER = "Cache/Models"  # memory mapped model arrays
+MODEL_CACHE_MAGIC = b"FAEMODEL"
+MODEL_CACHE_VERSION = 1  # bump when the model readers / stored arrays change
+MODEL_CACHE_ALIGN = 64  # array start alignment (bytes)
+
+# Asset loading settings
+ASSET_WORKERS = 4  # startup decoding threads (works releasing the GIL: image decoding, numpy parsing)
+ASSET_PROCESSES = 4  # startup processes (pure python works: simplifying, meshing)
+
+# Cell attach settings
+CELL_CAPACITY_HEADROOM = 0.25  # extra vertex capacity of dynamic cell attaches
+CELL_COMPACT_BUDGET = 4  # cells moved per compact() call (frame)
+
+# Mesh settings
+MESH_LOD_HYSTERESIS = 0.1  # LOD switch distance margin (fraction of the LOD distance)
+
+# Terrain LOD settings
+TERRAIN_LOD_ROOT = 256  # blocks per quadtree root side (8 * power of two)
+TERRAIN_LOD_SPLIT = 2.0  # nodes closer than SPLIT * node size to the camera are split
+TERRAIN_LOD_CACHE_NODES = 256  # uploaded nodes kept before LRU eviction
+TERRAIN_LOD_UPLOAD_BUDGET = 4  # nodes built & uploaded per frame
+
+# Horizon occlusion settings
+HORIZON_CELL = 4  # heightmap columns per occluder side
+HORIZON_BINS = 1024  # camera azimuth bins
+HORIZON_RING = 8  # distance ring width (blocks)
+HORIZON_DISTANCE = 1024  # occluders further than it are ignored (blocks)
+
+# Spatial index settings
+SPATIAL_GRID_CELL = 32  # grid cell side (blocks)
+SPATIAL_BVH_LEAF = 4  # BVH items per leaf
+SPATIAL_REBUILD_RATIO = 0.25  # BVH rebuild once inserted / removed / moved items pass this share
+SPATIAL_REBUILD_MIN = 16  # BVH size floor of the rebuild threshold
@@ -0,0 +1,208 @@
+# This file simplifies indexed meshes (quadric error half edge collapses) to build LOD chains
+import heapq
+import numpy as np
+from .Utils import weld_vertices
+
+# Bump on any change of the simplifier output (invalidates cached LODs)
+SIMPLIFY_VERSION = 1
+
+
+def face_quadrics(positions, faces) -> np.ndarray:
+    """
+    Per position area weighted plane quadrics (Garland & Heckbert)
+    """
+
+    a, b, c = positions[faces[:, 0]], positions[faces[:, 1]], positions[faces[:, 2]]
+    normals = np.cross(b - a, c - a)
+    areas = np.linalg.norm(normals, axis=1)
+    normals = normals / np.maximum(areas, 1e-20)[:, None]
+    planes = np.concatenate([normals, -np.sum(normals * a, axis=1)[:, None]], axis=1)
+    face_q = planes[:, :, None] * planes[:, None, :] * (areas / 2)[:, None, None]
+
+    quadrics = np.zeros((len(positions), 4, 4))
+    for corner in range(3):
+        np.add.at(quadrics, faces[:, corner], face_q)
+    return quadrics
+
+
+def locked_positions(faces, count) -> np.ndarray:
+    """
+    Positions on open boundaries or non manifold edges (never moved)
+    """
+
+    edges = np.sort(np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]]), axis=1)
+    edges, uses = np.unique(edges, axis=0, return_counts=True)
+    locked = np.zeros(count, bool)
+    locked[edges[uses != 2].ravel()] = True
+    return locked
+
+
+def simplify(positions, faces, corners, targets, keep_seams=True):
+    """
+    Quadric error half edge collapses (a position moves onto a neighbour position)
+    - keep_seams: every corner attribute (wedge) of the moved position must continue in a wedge of the kept
+      position across the collapsed edge, otherwise the collapse is skipped (UV / normal seams stay in place)
+    - not keep_seams: such wedges get a new wedge at the kept position (own uv / normal, for meshes that are
+      all seams like per patch UVs)
+    - Boundary positions never move, collapses flipping a face or breaking the manifold are skipped
+
+    Args:
+        positions (np.ndarray): (n, 3) unique positions
+        faces (np.ndarray): (f, 3) triangle position indices
+        corners (np.ndarray): (f, 3) triangle wedge (attribute vertex) indices
+        targets (list[int]): triangle counts, descending
+        keep_seams (bool): skip collapses moving a seam
+
+    Returns:
+        list[np.ndarray]: (f_i, 3) wedge triangles of every target (reached as close as the seams allow),
+        np.ndarray: (w, 2) (position, source input wedge) of new wedges (numbered after the input wedges)
+    """
+
+    positions = np.asarray(positions, np.float64)
+    homogeneous = np.concatenate([positions, np.ones((len(positions), 1))], axis=1)
+    quadrics = face_quadrics(positions, faces)
+    locked = locked_positions(faces, len(positions))
+
+    face_list = faces.tolist()
+    corner_list = corners.tolist()
+    alive = [True] * len(face_list)
+    face_count = len(face_list)
+    vertex_faces = [set() for _ in range(len(positions))]
+    for f, face in enumerate(face_list):
+        for p in face:
+            vertex_faces[p].add(f)
+    versions = [0] * len(positions)
+    wedges = []  # (position, source wedge) of new wedges
+    input_wedges = int(corners.max()) + 1 if len(corners) else 0
+    wedge_count = input_wedges
+
+    def cost(u, v):
+        point = homogeneous[v]
+        return float(point @ (quadrics[u] + quadrics[v]) @ point)
+
+    def neighbours(p):
+        return {q for f in vertex_faces[p] for q in face_list[f]} - {p}
+
+    heap = []
+
+    def push(u, v):
+        if not locked[u]:
+            heap.append((cost(u, v), u, v, versions[u], versions[v]))
+
+    for u in range(len(positions)):
+        for v in neighbours(u):
+            push(u, v)
+    heapq.heapify(heap)
+
+    def collapse(u, v):
+        shared = [f for f in vertex_faces[u] if v in face_list[f]]
+        if not shared or len(shared) > 2:
+            return False
+
+        # Manifold (link) condition
+        opposite = {p for f in shared for p in face_list[f]} - {u, v}
+        if neighbours(u) & neighbours(v) != opposite:
+            return False
+
+        # Wedges of u continue in wedges of v across the edge
+        wedge_map = {}
+        for f in shared:
+            face = face_list[f]
+            wedge_u = corner_list[f][face.index(u)]
+            wedge_v = corner_list[f][face.index(v)]
+            if wedge_map.setdefault(wedge_u, wedge_v) != wedge_v:
+                return False
+
+        moved = [f for f in vertex_faces[u] if f not in shared]
+        unmapped = {corner_list[f][face_list[f].index(u)] for f in moved} - wedge_map.keys()
+        if unmapped and keep_seams:
+            return False
+
+        # Face flips
+        if moved:
+            old = np.array([face_list[f] for f in moved])
+            new = np.where(old == u, v, old)
+            old_normals = np.cross(positions[old[:, 1]] - positions[old[:, 0]], positions[old[:, 2]] - positions[old[:, 0]])
+            new_normals = np.cross(positions[new[:, 1]] - positions[new[:, 0]], positions[new[:, 2]] - positions[new[:, 0]])
+            if np.any(np.sum(old_normals * new_normals, axis=1) <= 0):
+                return False
+
+        nonlocal wedge_count
+        for wedge in sorted(unmapped):
+            wedges.append((v, wedge if wedge < input_wedges else wedges[wedge - input_wedges][1]))
+            wedge_map[wedge] = wedge_count
+            wedge_count += 1
+
+        for f in shared:
+            alive[f] = False
+            for p in face_list[f]:
+                vertex_faces[p].discard(f)
+        for f in moved:
+            i = face_list[f].index(u)
+            corner_list[f][i] = wedge_map[corner_list[f][i]]
+            face_list[f][i] = v
+            vertex_faces[v].add(f)
+        vertex_faces[u] = set()
+
+        quadrics[v] += quadrics[u]
+        versions[u] += 1
+        versions[v] += 1
+        return len(shared)
+
+    results = []
+    for target in targets:
+        while face_count > target and heap:
+            _, u, v, version_u, version_v = heapq.heappop(heap)
+            if version_u != versions[u] or version_v != versions[v]:
+                continue
+
+            removed = collapse(u, v)
+            if not removed:
+                continue
+
+            face_count -= removed
+            for n in neighbours(v):
+                for a, b in ((n, v), (v, n)):
+                    if not locked[a]:
+                        heapq.heappush(heap, (cost(a, b), a, b, versions[a], versions[b]))
+
+        results.append(np.array([corner_list[f] for f in range(len(face_list)) if alive[f]], np.int64).reshape(-1, 3))
+
+    return results, np.array(wedges, np.int64).reshape(-1, 2)
+
+
+def simplify_chain(vertices, normals=None, uvs=None, ratios=(0.5, 0.25), keep_seams=True):
+    """
+    LOD chain of a formatted (triangle order) mesh
+
+    Args:
+        vertices (np.ndarray): formatted positions
+        normals (np.ndarray): formatted normals
+        uvs (np.ndarray): formatted uvs
+        ratios (tuple): triangle count ratios of every level, descending
+        keep_seams (bool): see simplify()
+
+    Returns:
+        list[tuple]: (vertices, normals, uvs, indices uint32) welded mesh of every ratio
+    """
+
+    (w_vertices, w_normals, w_uvs), indices = weld_vertices(vertices, normals, uvs)
+    corners = indices.astype(np.int64).reshape(-1, 3)
+    positions, wedge_positions = np.unique(w_vertices, axis=0, return_inverse=True)
+    faces = wedge_positions.ravel()[corners]
+
+    levels, new_wedges = simplify(positions, faces, corners, [int(len(corners) * ratio) for ratio in ratios], keep_seams)
+
+    # New wedges: kept position, attributes of the source wedge
+    sources = np.concatenate([np.arange(len(w_vertices)), new_wedges[:, 1]])
+    wedge_vertices = np.concatenate([w_vertices, positions[new_wedges[:, 0]].astype(np.float32)])
+
+    chain = []
+    for level in levels:
+        used, level_indices = np.unique(level.ravel(), return_inverse=True)
+        chain.append((wedge_vertices[used],
+                      None if w_normals is None else w_normals[sources[used]],
+                      None if w_uvs is None else w_uvs[sources[used]],
+                      level_indices.astype(np.uint32)))
+
+    return chain
@@ -0,0 +1,320 @@
+# This file indexes scene boxes (uniform grid for grid aligned regions, BVH for the others) for spatial queries
+import numpy as np
+from .Settings2 import *
+from .Frustum import visible_boxes
+
+
+def boxes_overlap(lows, highs, low, high) -> np.ndarray:
+    return np.all(lows <= high, axis=-1) & np.all(highs >= low, axis=-1)
+
+
+def boxes_radius(lows, highs, center, radius) -> np.ndarray:
+    nearest = np.clip(center, lows, highs)
+    return np.sum((nearest - center) ** 2, axis=-1) <= radius ** 2
+
+
+def boxes_ray(lows, highs, origin, direction, max_distance=np.inf) -> np.ndarray:
+    """
+    Ray entry distance of every box (0 when the origin is inside, inf when missed)
+    """
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inverse = 1 / direction
+        t0 = (lows - origin) * inverse
+        t1 = (highs - origin) * inverse
+
+    # Parallel axes: nan (origin on the slab border) counts as inside the slab
+    near = np.nanmax(np.minimum(t0, t1), axis=-1)
+    far = np.nanmin(np.maximum(t0, t1), axis=-1)
+    near = np.maximum(near, 0)
+    return np.where((near <= far) & (near <= max_distance), near, np.inf)
+
+
+class BVH:
+    """
+    Bounding volume hierarchy of item boxes (median split on the longest axis)
+    - refit() grows the parents of a moved item (the tree gets looser until SpatialIndex rebuilds it)
+    """
+
+    def __init__(self, items, lows, highs, leaf_size=SPATIAL_BVH_LEAF) -> None:
+        self.items = list(items)
+        self.lows = np.asarray(lows, np.float64).reshape(-1, 3).copy()
+        self.highs = np.asarray(highs, np.float64).reshape(-1, 3).copy()
+        self.order = np.arange(len(self.items))
+        self.leaf_of = np.zeros(len(self.items), np.int64)
+
+        node_lows, node_highs, children, ranges, parents = [], [], [], [], []
+        stack = [(0, len(self.items), -1)]
+        while stack and len(self.items):
+            start, end, parent = stack.pop()
+            node = len(node_lows)
+            indices = self.order[start:end]
+            low = self.lows[indices].min(axis=0)
+            high = self.highs[indices].max(axis=0)
+            node_lows.append(low)
+            node_highs.append(high)
+            parents.append(parent)
+            ranges.append((start, end - start))
+            children.append((-1, -1))
+            if parent >= 0:
+                left, right = children[parent]
+                children[parent] = (node, right) if left < 0 else (left, node)
+
+            if end - start <= leaf_size:
+                self.leaf_of[indices] = node
+                continue
+
+            centers = self.lows[indices] + self.highs[indices]
+            axis = int(np.argmax(high - low))
+            middle = (end - start) // 2
+            self.order[start:end] = indices[np.argpartition(centers[:, axis], middle)]
+            # Right first: the left child is built (and linked) first
+            stack.append((start + middle, end, node))
+            stack.append((start, start + middle, node))
+
+        self.node_lows = np.array(node_lows, np.float64).reshape(-1, 3)
+        self.node_highs = np.array(node_highs, np.float64).reshape(-1, 3)
+        self.children = np.array(children, np.int64).reshape(-1, 2)
+        self.ranges = np.array(ranges, np.int64).reshape(-1, 2)
+        self.parents = np.array(parents, np.int64)
+
+    def refit(self, index, low, high):
+        """
+        Moves item index to a new box, grows its parent nodes
+        """
+
+        self.lows[index] = low
+        self.highs[index] = high
+        node = self.leaf_of[index]
+        while node >= 0:
+            self.node_lows[node] = np.minimum(self.node_lows[node], low)
+            self.node_highs[node] = np.maximum(self.node_highs[node], high)
+            node = self.parents[node]
+
+    def search(self, test):
+        """
+        Item indices whose box passes test (test(lows, highs) -> bool array, used on nodes and items)
+        """
+
+        if len(self.node_lows) == 0 or not test(self.node_lows[:1], self.node_highs[:1])[0]:
+            return []
+
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self.children[node, 0] < 0:
+                start, count = self.ranges[node]
+                indices = self.order[start:start + count]
+                found.extend(indices[test(self.lows[indices], self.highs[indices])].tolist())
+                continue
+
+            kids = self.children[node]
+            stack.extend(kids[test(self.node_lows[kids], self.node_highs[kids])].tolist())
+
+        return found
+
+
+class SpatialIndex:
+    """
+    Scene spatial index !
+    - grid items (chunks, cells): uniform xz grid of cell x cell columns
+    - other items (meshes, objects): BVH, moved items are refitted, inserted items wait in a list,
+      the BVH is rebuilt once waiting / removed / moved items pass rebuild_ratio of its size
+    - Queries: box, radius, frustum and ray (nearest first)
+    """
+
+    def __init__(self, cell=SPATIAL_GRID_CELL, leaf_size=SPATIAL_BVH_LEAF, rebuild_ratio=SPATIAL_REBUILD_RATIO) -> None:
+        """
+        Args:
+            cell (float): grid cell side (blocks)
+            leaf_size (int): BVH items per leaf
+            rebuild_ratio (float): BVH rebuild threshold (changed items / BVH items)
+        """
+
+        self.cell = cell
+        self.leaf_size = leaf_size
+        self.rebuild_ratio = rebuild_ratio
+        self.boxes = {}  # item: (low, high)
+        self.grid = {}  # (x, z) cell: {item: None}
+        self.grid_cells = {}  # grid item: cells
+        self.cell_heights = {}  # (x, z) cell: [low y, high y] of its items (grows only)
+        self.cell_arrays = None  # cells, lows, highs of occupied cells
+        self.tree = BVH([], np.zeros((0, 3)), np.zeros((0, 3)), leaf_size)
+        self.tree_index = {}  # BVH item: BVH index
+        self.pending = {}  # BVH items inserted after the last rebuild
+        self.changes = 0  # removed / moved BVH items since the last rebuild
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, item):
+        return item in self.boxes
+
+    def cell_range(self, low, high):
+        return (int(np.floor(low[0] / self.cell)), int(np.floor(high[0] / self.cell)),
+                int(np.floor(low[2] / self.cell)), int(np.floor(high[2] / self.cell)))
+
+    def covered_cells(self, low, high):
+        x0, x1, z0, z1 = self.cell_range(low, high)
+        return [(x, z) for x in range(x0, x1 + 1) for z in range(z0, z1 + 1)]
+
+    def insert(self, item, low, high, grid=False):
+        """
+        Registers item with its world box (grid: grid aligned regions like chunks)
+        """
+
+        if item in self.boxes:
+            self.remove(item)
+
+        low = np.asarray(low, np.float64).reshape(3)
+        high = np.asarray(high, np.float64).reshape(3)
+        self.boxes[item] = (low, high)
+
+        if grid:
+            cells = self.covered_cells(low, high)
+            self.grid_cells[item] = cells
+            for cell in cells:
+                self.grid.setdefault(cell, {})[item] = None
+                heights = self.cell_heights.setdefault(cell, [low[1], high[1]])
+                heights[0] = min(heights[0], low[1])
+                heights[1] = max(heights[1], high[1])
+            self.cell_arrays = None
+        else:
+            self.pending[item] = None
+
+    def remove(self, item):
+        self.boxes.pop(item)
+
+        if item in self.grid_cells:
+            for cell in self.grid_cells.pop(item):
+                del self.grid[cell][item]
+                if not self.grid[cell]:
+                    del self.grid[cell]
+                    del self.cell_heights[cell]
+            self.cell_arrays = None
+        elif item in self.pending:
+            del self.pending[item]
+        else:
+            del self.tree_index[item]
+            self.changes += 1
+
+    def update(self, item, low, high):
+        """
+        Moves a registered item to a new world box
+        """
+
+        if item in self.grid_cells:
+            self.insert(item, low, high, grid=True)
+            return
+
+        low = np.asarray(low, np.float64).reshape(3)
+        high = np.asarray(high, np.float64).reshape(3)
+        self.boxes[item] = (low, high)
+        if item in self.tree_index:
+            self.tree.refit(self.tree_index[item], low, high)
+            self.changes += 1
+
+    def rebuild(self):
+        """
+        Rebuilds the BVH from every non grid item
+        """
+
+        items = list(self.tree_index) + list(self.pending)
+        lows = np.array([self.boxes[item][0] for item in items], np.float64).reshape(-1, 3)
+        highs = np.array([self.boxes[item][1] for item in items], np.float64).reshape(-1, 3)
+        self.tree = BVH(items, lows, highs, self.leaf_size)
+        self.tree_index = {item: i for i, item in enumerate(items)}
+        self.pending = {}
+        self.changes = 0
+
+    def occupied_cells(self):
+        if self.cell_arrays is None:
+            cells = list(self.grid)
+            coordinates = np.array(cells, np.float64).reshape(-1, 2) * self.cell
+            heights = np.array([self.cell_heights[cell] for cell in cells], np.float64).reshape(-1, 2)
+            lows = np.stack((coordinates[:, 0], heights[:, 0], coordinates[:, 1]), axis=1)
+            highs = np.stack((coordinates[:, 0] + self.cell, heights[:, 1], coordinates[:, 1] + self.cell), axis=1)
+            self.cell_arrays = cells, lows, highs
+        return self.cell_arrays
+
+    def search(self, test, low=None, high=None):
+        """
+        Items whose box passes test (test(lows, highs) -> bool array)
+
+        Args:
+            test (function): box test, also used on grid cells and BVH nodes (must be conservative for them)
+            low, high (np.ndarray): query bounds (limits the visited grid cells, None: every occupied cell)
+        """
+
+        if len(self.pending) + self.changes > self.rebuild_ratio * max(len(self.tree_index), SPATIAL_REBUILD_MIN):
+            self.rebuild()
+
+        found = [self.tree.items[i] for i in self.tree.search(test) if self.tree.items[i] in self.tree_index]
+
+        # Grid cells: visit the covered cells when cheaper than testing every occupied cell
+        x0, x1, z0, z1 = self.cell_range(low, high) if low is not None else (0, np.inf, 0, np.inf)
+        if (x1 - x0 + 1) * (z1 - z0 + 1) < len(self.grid):
+            cells = [cell for cell in self.covered_cells(low, high) if cell in self.grid]
+        else:
+            cells, lows, highs = self.occupied_cells()
+            cells = [cell for cell, shown in zip(cells, test(lows, highs)) if shown]
+        candidates = list({item: None for cell in cells for item in self.grid[cell]})
+        candidates += list(self.pending)
+
+        if candidates:
+            lows = np.array([self.boxes[item][0] for item in candidates])
+            highs = np.array([self.boxes[item][1] for item in candidates])
+            found += [item for item, shown in zip(candidates, test(lows, highs)) if shown]
+
+        return found
+
+    def query_box(self, low, high):
+        """
+        Items whose box overlaps the box (low, high)
+        """
+
+        low = np.asarray(low, np.float64)
+        high = np.asarray(high, np.float64)
+        return self.search(lambda lows, highs: boxes_overlap(lows, highs, low, high), low, high)
+
+    def query_radius(self, center, radius):
+        """
+        Items whose box is closer than radius to center
+        """
+
+        center = np.asarray(center, np.float64)
+        return self.search(lambda lows, highs: boxes_radius(lows, highs, center, radius), center - radius, center + radius)
+
+    def query_frustum(self, planes):
+        """
+        Items whose box touches the frustum (Frustum.frustum_planes() of the world space matrices)
+        """
+
+        return self.search(lambda lows, highs: visible_boxes(planes, lows, highs))
+
+    def query_ray(self, origin, direction, max_distance=np.inf):
+        """
+        Items hit by the ray, nearest first
+
+        Returns:
+            list[tuple]: (box entry distance, item)
+        """
+
+        origin = np.asarray(origin, np.float64)
+        direction = np.asarray(direction, np.float64)
+        end = origin + direction * (max_distance if np.isfinite(max_distance) else 0)
+
+        def test(lows, highs):
+            return np.isfinite(boxes_ray(lows, highs, origin, direction, max_distance))
+
+        bounds = (np.minimum(origin, end), np.maximum(origin, end)) if np.isfinite(max_distance) else (None, None)
+        items = self.search(test, *bounds)
+        if not items:
+            return []
+
+        lows = np.array([self.boxes[item][0] for item in items])
+        highs = np.array([self.boxes[item][1] for item in items])
+        distances = boxes_ray(lows, highs, origin, direction, max_distance)
+        order = np.argsort(distances, kind="stable")
+        return [(float(distances[i]), items[i]) for i in order]
@@ -3,19 +3,25 @@ from OpenGL.GL import *
 
 
 class Texture():
-    def __init__(self, filename=None):
+    """
+    - surface: already loaded pygame surface (embedded model images)
+    - flip: first row at the bottom (obj uvs), False keeps top left uv origins (glTF uvs)
+    """
+    def __init__(self, filename=None, surface=None, flip=True):
         print("Loading Textures...")
-        self.surface = None
+        self.surface = surface
+        self.flip = flip
         self.texture_id = glGenTextures(1)
         if filename is not None:
             self.surface = pygame.image.load(filename)
+        if self.surface is not None:
             self.load()
 
     def load(self):
         width = self.surface.get_width()
         height = self.surface.get_height()
 
-        pixel_data = pygame.image.tostring(self.surface, "RGBA", 1)
+        pixel_data = pygame.image.tostring(self.surface, "RGBA", self.flip)
         glBindTexture(GL_TEXTURE_2D, self.texture_id)
         glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, pixel_data)
         glGenerateMipmap(GL_TEXTURE_2D)
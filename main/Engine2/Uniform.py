@@ -13,6 +13,8 @@ class Uniform:
     def load(self):
         if self.data_type == "vec3":
             glUniform3f(self.variable_id, self.data[0], self.data[1], self.data[2])
+        elif self.data_type == "vec4":
+            glUniform4f(self.variable_id, self.data[0], self.data[1], self.data[2], self.data[3])
         elif self.data_type == "mat4":
             glUniformMatrix4fv(self.variable_id, 1, GL_TRUE, self.data)
         elif self.data_type == "sampler2D":
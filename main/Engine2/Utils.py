@@ -7,12 +7,37 @@ from OpenGL.GL import *
 
 
 def format_vertices(coordinates, triangles) -> np.ndarray:
-    allTriangles = []
-    for t in range(0, len(triangles), 3):
-        allTriangles.append(coordinates[triangles[t]])
-        allTriangles.append(coordinates[triangles[t+1]])
-        allTriangles.append(coordinates[triangles[t+2]])
-    return np.array(allTriangles, np.float32)
+    if len(triangles) == 0:
+        return np.array([], np.float32)
+    return np.asarray(coordinates, np.float32)[np.asarray(triangles, np.int64)]
+
+
+def weld_vertices(*attributes):
+    """
+    Welds formatted vertices whose attributes are all equal (position/uv/normal/... combinations)
+
+    Args:
+        attributes (np.ndarray | list | None): formatted per vertex attributes (None is passed through)
+
+    Returns:
+        welded attributes (list), indices (np.ndarray uint32): unique vertices in first use order
+    """
+
+    count = len(attributes[0])
+    arrays = [None if a is None else np.asarray(a, np.float32).reshape(count, -1) for a in attributes]
+    present = [a for a in arrays if a is not None]
+    rows = np.ascontiguousarray(np.concatenate(present, axis=1))
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # Keep first use order (cache friendly)
+    order = np.argsort(first)
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    indices = remap[inverse.ravel()].astype(np.uint32)
+    unique = first[order]
+
+    return [None if a is None else a[unique] for a in arrays], indices
 
 
 def compile_shader(shader_type, shader_source):
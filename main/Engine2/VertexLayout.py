@@ -0,0 +1,129 @@
+# This file packs vertex attributes into one interleaved buffer with compact (quantized) types
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+GL_TYPES = {
+    np.dtype(np.float32): GL_FLOAT,
+    np.dtype(np.int16): GL_SHORT,
+    np.dtype(np.uint16): GL_UNSIGNED_SHORT,
+    np.dtype(np.int8): GL_BYTE,
+    np.dtype(np.uint8): GL_UNSIGNED_BYTE
+}
+
+
+class VertexLayout:
+    """
+    Interleaved vertex layout
+    - attributes: (shader variable, components, dtype, normalized)
+    - normalized integers are read as [0, 1] / [-1, 1] floats, the others as plain floats
+    - every attribute starts 4 byte aligned
+    """
+
+    def __init__(self, attributes):
+        self.attributes = []
+        offset = 0
+        for name, components, dtype, normalized in attributes:
+            dtype = np.dtype(dtype)
+            self.attributes.append((name, components, dtype, normalized, offset))
+            offset += -(-components * dtype.itemsize // 4) * 4
+
+        self.stride = offset
+        self.dtype = np.dtype({
+            "names": [name for name, *_ in self.attributes],
+            "formats": [(dtype, (components,)) for _, components, dtype, _, _ in self.attributes],
+            "offsets": [offset for *_, offset in self.attributes],
+            "itemsize": self.stride
+        })
+
+    def pack(self, **arrays) -> np.ndarray:
+        """
+        Interleaved (structured) vertex array of float attribute arrays (quantized to the layout types)
+        """
+
+        count = len(arrays[self.attributes[0][0]])
+        packed = np.zeros(count, self.dtype)
+        for name, components, dtype, normalized, _ in self.attributes:
+            array = np.asarray(arrays[name], np.float32).reshape(count, components)
+            if dtype.kind in "iu":
+                limits = np.iinfo(dtype)
+                if normalized:
+                    array = array * limits.max
+                array = np.clip(np.rint(array), limits.min, limits.max)
+            packed[name] = array
+
+        return packed
+
+    def create_variables(self, program_id):
+        """
+        Attribute pointers of the bound buffer (shader variables missing in the program are skipped)
+        """
+
+        for name, components, dtype, normalized, offset in self.attributes:
+            variable_id = glGetAttribLocation(program_id, name)
+            if variable_id < 0:
+                continue
+            glVertexAttribPointer(variable_id, components, GL_TYPES[dtype], normalized, self.stride, ctypes.c_void_p(offset))
+            glEnableVertexAttribArray(variable_id)
+
+
+def quantize_positions(vertices):
+    """
+    Exact int16 positions: (vertices - origin) * step for the smallest power of two step (up to 256)
+
+    Returns:
+        decode (tuple): (origin x, origin y, origin z, 1 / step), None if int16 can't hold the positions exactly
+    """
+
+    vertices = np.asarray(vertices, np.float32).reshape(-1, 3)
+    if len(vertices) == 0:
+        return None
+
+    origin = np.floor(vertices.min(axis=0))
+    local = vertices - origin
+    step = 1
+    while step <= 256:
+        scaled = local * step
+        if scaled.max() <= np.iinfo(np.int16).max and np.array_equal(scaled, np.rint(scaled)):
+            return float(origin[0]), float(origin[1]), float(origin[2]), 1 / step
+        step *= 2
+
+    return None
+
+
+def compact_layout(vertices, vertex_normals=None, vertex_uvs=None, vertex_tiles=None):
+    """
+    Picks compact types for mesh attributes
+    - position: int16 (exact, see quantize_positions) or float32
+    - normal: normalized int8
+    - uv: normalized uint16 inside [0, 1], int16 for whole numbers (tile units) or float32
+    - tile: normalized uint16 (atlas rectangles)
+
+    Returns:
+        layout (VertexLayout), decode (tuple): position decode (origin x, y, z, scale)
+    """
+
+    attributes = []
+    decode = quantize_positions(vertices)
+    if decode is None:
+        attributes.append(("position", 3, np.float32, False))
+        decode = (0.0, 0.0, 0.0, 1.0)
+    else:
+        attributes.append(("position", 3, np.int16, False))
+
+    if vertex_normals is not None:
+        attributes.append(("vertex_normal", 3, np.int8, True))
+
+    if vertex_uvs is not None:
+        uvs = np.asarray(vertex_uvs, np.float32)
+        if uvs.size and uvs.min() >= 0 and uvs.max() <= 1:
+            attributes.append(("vertex_uv", 2, np.uint16, True))
+        elif uvs.size and np.abs(uvs).max() <= np.iinfo(np.int16).max and np.array_equal(uvs, np.rint(uvs)):
+            attributes.append(("vertex_uv", 2, np.int16, False))
+        else:
+            attributes.append(("vertex_uv", 2, np.float32, False))
+
+    if vertex_tiles is not None:
+        attributes.append(("vertex_tile", 4, np.uint16, True))
+
+    return VertexLayout(attributes), decode
@@ -0,0 +1,79 @@
+# This file runs cpu heavy building (meshing, ...) on a process pool, results come back in shared memory
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+
+
+def share_arrays(arrays):
+    """
+    Copies arrays into one shared memory block
+
+    Returns:
+        name (str), layout (list[tuple]): shared memory name and (dtype, shape, offset) of every array
+    """
+
+    arrays = [np.ascontiguousarray(array) for array in arrays]
+    layout = []
+    size = 0
+    for array in arrays:
+        layout.append((array.dtype.str, array.shape, size))
+        size += array.nbytes
+
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for array, (dtype, shape, offset) in zip(arrays, layout):
+        np.ndarray(shape, dtype, buffer=block.buf, offset=offset)[...] = array
+
+    # The collecting process owns (unlinks) the block, not this worker
+    if os.name == "posix":
+        resource_tracker.unregister(block._name, "shared_memory")
+
+    name = block.name
+    block.close()
+    return name, layout
+
+
+def collect_arrays(name, layout):
+    """
+    Reads (copies) arrays of a shared memory block and frees the block
+    """
+
+    block = shared_memory.SharedMemory(name=name)
+    arrays = [np.ndarray(shape, dtype, buffer=block.buf, offset=offset).copy() for dtype, shape, offset in layout]
+    block.close()
+    block.unlink()
+    return arrays
+
+
+def run_shared(func, args):
+    """
+    Worker side: runs func and shares its arrays
+    """
+
+    return share_arrays(func(*args))
+
+
+def split_batches(items, count):
+    """
+    Splits items into count contiguous batches (order kept, empty batches dropped)
+    """
+
+    bounds = np.linspace(0, len(items), count + 1).astype(int)
+    return [items[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def run_parallel(func, tasks, workers):
+    """
+    Runs func(*task) for every task on a process pool
+
+    Args:
+        func (function): module level function returning a tuple of np.ndarray
+        tasks (list[tuple]): func arguments (must be picklable)
+        workers (int): process count
+
+    Returns:
+        list[list[np.ndarray]]: results in task order
+    """
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [collect_arrays(name, layout) for name, layout in pool.map(run_shared, [func] * len(tasks), tasks)]
@@ -1,5 +1,6 @@
 import pygame
 import random
+from functools import partial
 from main.Engine2.Screen import *
 from main.Engine2.LoadObject import *
 from main.Engine2.Light import *
@@ -8,6 +9,11 @@ from main.Engine2.Axes import *
 from main.Engine2.CellAttach import *
 from main.Engine2.Settings2 import *
 from main.Engine2.Transformations import Rotation
+from main.Engine2.Cache import MeshCache, ModelCache
+from main.Engine2.Spatial import SpatialIndex
+from main.Engine2.Frustum import frustum_planes
+from main.Engine2.AssetLoader import AssetLoader
+from main.Engine2.Geometry import GeometryRegistry
 from time import sleep
 from datetime import datetime
 
@@ -70,40 +76,82 @@ class MultiShaders(Screen):
         texturefrag = r"Shaders\texturedfrag.vs"
         vertexcolvert = r"Shaders\vertexcolvert.vs"
         vertexcolfrag = r"Shaders\vertexcolfrag.vs"
+        atlasvert = r"Shaders\atlasvert.vs"
+        atlasfrag = r"Shaders\atlasfrag.vs"
+        instancedvert = r"Shaders\instancedvert.vs"
 
         # Shaders
         print("Loading Shaders...")
         self.mat = Material(texturevert, texturefrag)
         axesmat = Material(vertexcolvert, vertexcolfrag)
+        self.atlas_mat = Material(atlasvert, atlasfrag)
+        self.instanced_mat = Material(instancedvert, texturefrag)
 
         # Entity
         print("Loading Entitis...")
+        self.mesh_cache = MeshCache()
+        self.model_cache = ModelCache()
+        self.geometry = GeometryRegistry()  # identical meshes share one upload
+        self.spatial = SpatialIndex()  # scene meshes (frustum queried every frame)
+        self.cell_spatial = SpatialIndex()  # floor cells
         self.axes = Axes(pygame.Vector3(0, 0, 0), axesmat)
         self.light = Light(self.light_pos, pygame.Vector3(1, 1, 1), 0)
         self.camera = Camera(self.screen_width, self.screen_height)
-        self.light_bolb = LoadObject(self.obj_cube, imagefile=self.img_sun, draw_type=GL_TRIANGLES, material=self.mat,
-                                     location=self.light_pos, scale=pygame.Vector3(8, 8, 8))
-        self.teapot = LoadObject(self.obj_teapot, imagefile=self.img_teapot, material=self.mat, location=pygame.Vector3(80, 3, 80), scale=pygame.Vector3(0.2, 0.2, 0.2))
-        self.donut = LoadObject(self.obj_donut, imagefile=self.img_crete, material=self.mat, location=pygame.Vector3(70, 25, 58), scale=pygame.Vector3(5, 5, 5))
-        self.granny = LoadObject(self.obj_granny, imagefile=self.img_missing, material=self.mat, location=pygame.Vector3(80, 1, 60), scale=(pygame.Vector3(0.1, 0.1, 0.1)))
-        self.fae_block = LoadObject(self.obj_cube, imagefile=self.img_fae, material=self.mat, location=pygame.Vector3(72, 6, 78), scale=pygame.Vector3(2, 2, 2))
+
+        # Assets: image decoding on worker threads, parsing / meshing on worker processes, GL objects created here as they finish
+        loader = AssetLoader(progress=self.loading_progress)
+        for image in (self.img_texture, self.img_sun, self.img_crete, self.img_teapot, self.img_missing, self.img_fae):
+            loader.add(image, lambda image=image: pygame.image.load(image), lambda surface: Texture(surface=surface))
+
+        loader.add("cube", partial(LoadObject.prepare, self.obj_cube, model_cache=self.model_cache), process=True)
+        loader.add("teapot", partial(LoadObject.prepare, self.obj_teapot, indexed=True, model_cache=self.model_cache,
+                                     auto_lods=[(40, 0.5), (80, 0.25)], keep_seams=False, cache=self.mesh_cache), process=True)
+        loader.add("donut", partial(LoadObject.prepare, self.obj_donut, model_cache=self.model_cache), process=True)
+        loader.add("granny", partial(LoadObject.prepare, self.obj_granny, indexed=True, model_cache=self.model_cache,
+                                     auto_lods=[(40, 0.5), (80, 0.25)], cache=self.mesh_cache), process=True)
+
+        loader.add("light_bolb", upload=lambda _: LoadObject(self.obj_cube, imagefile=loader[self.img_sun], draw_type=GL_TRIANGLES, material=self.mat,
+                                                             location=self.light_pos, scale=pygame.Vector3(8, 8, 8), spatial=self.spatial, registry=self.geometry, prepared=loader["cube"]),
+                   after=("cube", self.img_sun))
+        loader.add("teapot_mesh", upload=lambda _: LoadObject(self.obj_teapot, imagefile=loader[self.img_teapot], material=self.mat, location=pygame.Vector3(80, 3, 80), scale=pygame.Vector3(0.2, 0.2, 0.2), indexed=True,
+                                                              auto_lods=[(40, 0.5), (80, 0.25)], keep_seams=False, cache=self.mesh_cache, spatial=self.spatial, registry=self.geometry, prepared=loader["teapot"]),
+                   after=("teapot", self.img_teapot))
+        loader.add("donut_mesh", upload=lambda _: LoadObject(self.obj_donut, imagefile=loader[self.img_crete], material=self.mat, location=pygame.Vector3(70, 25, 58), scale=pygame.Vector3(5, 5, 5), spatial=self.spatial, registry=self.geometry, prepared=loader["donut"]),
+                   after=("donut", self.img_crete))
+        loader.add("granny_mesh", upload=lambda _: LoadObject(self.obj_granny, imagefile=loader[self.img_missing], material=self.mat, location=pygame.Vector3(80, 1, 60), scale=(pygame.Vector3(0.1, 0.1, 0.1)), indexed=True,
+                                                              auto_lods=[(40, 0.5), (80, 0.25)], cache=self.mesh_cache, spatial=self.spatial, registry=self.geometry, prepared=loader["granny"]),
+                   after=("granny", self.img_missing))
+        loader.add("fae_block", upload=lambda _: LoadObject(self.obj_cube, imagefile=loader[self.img_fae], material=self.mat, location=pygame.Vector3(72, 6, 78), scale=pygame.Vector3(2, 2, 2), spatial=self.spatial, registry=self.geometry, prepared=loader["cube"]),
+                   after=("cube", self.img_fae))
 
         # World Design
-        self.main_room_floor = ChunkAttach(numberx=20, numberz=20, custom_shematic=np.ones(shape=(8, 8, 1)), atlas_map=(15.999, 15.999, 1, 2, 12, 13))
-        self.main_room_wall = ChunkAttach(numberx=5, numberz=5, custom_shematic=np.ones(shape=(8, 8, 1)), atlas_map=(15.999, 15.999, 1, 2, 12, 13))
+        loader.add("main_room_floor", partial(ChunkAttach, numberx=20, numberz=20, custom_shematic=np.ones(shape=(8, 8, 1)), atlas_map=(15.999, 15.999, 1, 2, 12, 13), mesher="greedy", cache=self.mesh_cache), process=True)
+        loader.add("main_room_wall", partial(ChunkAttach, numberx=5, numberz=5, custom_shematic=np.ones(shape=(8, 8, 1)), atlas_map=(15.999, 15.999, 1, 2, 12, 13), mesher="culled", cache=self.mesh_cache), process=True)
 
-        self.block = Block(40, 1.5, 40, self.img_crete, material=self.mat)
-        self.trees = TreeAttach(startX=0, startY=0, numberx=20, numberz=20, atlas_map=(15.999, 15.999, 0, 1, 8, 9), seed=100, in_chance=[0, 1, 2, 3, 4])
-        self.trees2 = TreeAttach(startX=0, startY=0, numberx=20, numberz=20, atlas_map=(15.999, 15.999, 0, 1, 14, 15), seed=100, in_chance=[5, 6, 7, 8, 9])
+        loader.add("block", upload=lambda _: Block(40, 1.5, 40, loader[self.img_crete], material=self.mat, spatial=self.spatial, registry=self.geometry), after=(self.img_crete,))
+        loader.add("trees", partial(TreeAttach, startX=0, startY=0, numberx=20, numberz=20, atlas_map=(15.999, 15.999, 0, 1, 8, 9), seed=100, in_chance=[0, 1, 2, 3, 4], cache=self.mesh_cache, instanced=True), process=True)
+        loader.add("trees2", partial(TreeAttach, startX=0, startY=0, numberx=20, numberz=20, atlas_map=(15.999, 15.999, 0, 1, 14, 15), seed=100, in_chance=[5, 6, 7, 8, 9], cache=self.mesh_cache, instanced=True), process=True)
 
         # Object Attach
 
         # Cell Attaches
+        loader.add("A_main_room_floor", upload=lambda _: CellAttach(loader["main_room_floor"].terrain, image=loader[self.img_texture], shader=self.atlas_mat, indexed=True, compact=True, spatial=self.cell_spatial),
+                   after=("main_room_floor", self.img_texture))
+        loader.add("forest", upload=lambda _: loader["trees"].instanced_mesh(shader=self.instanced_mat, image=loader[self.img_texture]),
+                   after=("trees", self.img_texture))
+        loader.add("forest2", upload=lambda _: loader["trees2"].instanced_mesh(shader=self.instanced_mat, image=loader[self.img_texture]),
+                   after=("trees2", self.img_texture))
+
         cell_start = datetime.now()
         print("Cell Attach started at:" + str(cell_start.now()))
-        self.A_main_room_floor = CellAttach(self.main_room_floor.terrain, image=self.img_texture, shader=self.mat)
-        self.forest = CellAttach(self.trees.forest, image=self.img_texture, shader=self.mat)
-        self.forest2 = CellAttach(self.trees2.forest, image=self.img_texture, shader=self.mat)
+        loader.run()
+
+        self.light_bolb, self.fae_block, self.block = loader["light_bolb"], loader["fae_block"], loader["block"]
+        self.teapot, self.donut, self.granny = loader["teapot_mesh"], loader["donut_mesh"], loader["granny_mesh"]
+        self.main_room_floor, self.main_room_wall = loader["main_room_floor"], loader["main_room_wall"]
+        self.trees, self.trees2 = loader["trees"], loader["trees2"]
+        self.A_main_room_floor, self.forest, self.forest2 = loader["A_main_room_floor"], loader["forest"], loader["forest2"]
+        self.scene = [self.light_bolb, self.fae_block, self.block, self.teapot, self.donut, self.granny]
 
     def initialise(self):
         # Variables
@@ -125,6 +173,7 @@ class MultiShaders(Screen):
         glClearColor(0, 0, 0, 0.5)  # Sky Black
 
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self.camera.move()
         
         #####
         keys = pygame.key.get_pressed()
@@ -174,15 +223,16 @@ class MultiShaders(Screen):
         if self.x_counter == 0:
             self.axes.draw(self.camera, self.light)
 
-        self.block.draw(self.camera, self.light)
-        self.light_bolb.draw(self.camera, self.light)
-        self.A_main_room_floor.world.draw(self.camera, self.light)
-        self.teapot.draw(self.camera, self.light)
-        self.forest.world.draw(self.camera, self.light)
-        self.forest2.world.draw(self.camera, self.light)
-        self.donut.draw(self.camera, self.light)
-        self.granny.draw(self.camera, self.light)
-        self.fae_block.draw(self.camera, self.light)
+        self.A_main_room_floor.draw(self.camera, self.light)
+        self.forest.draw(self.camera, self.light)
+        self.forest2.draw(self.camera, self.light)
+
+        # Scene objects move every frame (drawn or not), only the ones inside the camera frustum are drawn
+        for mesh in self.scene:
+            mesh.update()
+        planes = frustum_planes(self.camera.projection_mat, self.camera.transformation)
+        for mesh in self.spatial.query_frustum(planes):
+            mesh.draw(self.camera, self.light)
 
         sun_end = int(time())
         sun_current = self.sun_start - sun_end
@@ -1,8 +1,10 @@
 from main.Engine2.Utils import format_vertices
+from main.Level.module_3dicu_v0_1_1_beta.Mesher import mesh_chunks, greedy_chunks, split_chunks, chunk_key, load_cached, save_cached
+from main.Level.module_3dicu_v0_1_1_beta.Voxels import VoxelChunk
 
 
 class Chunk:
-    def __init__(self, position=None, max_height=10, min_depth=-10, max_depth=-13, shematic=None, img=None, atlas_map=None, material=None) -> None:
+    def __init__(self, position=None, max_height=10, min_depth=-10, max_depth=-13, shematic=None, img=None, atlas_map=None, material=None, mesher="numpy", build=True, cache=None, voxels=None) -> None:
         """
         Chunk generator
 
@@ -15,6 +17,12 @@ class Chunk:
             img (): block textures
             atlas_map: (tuple): atlas texture mapping information (L, H, HMF, HML, VMF, VML)
             material: (): shader
+            mesher (str): "numpy" (vectorized), "culled" (faces next to air only),
+                "greedy" (culled + merged quads, needs the atlas shader) or "python" (level_maker)
+            build (bool): build the mesh now (False: left to build() / ChunkAttach)
+            cache (main.Engine2.Cache.MeshCache): on-disk mesh cache (None: always mesh)
+            voxels (VoxelChunk | bool): voxel store meshed instead of the shematic heights (True: built from the
+                shematic, caves / overhangs / edits go through voxels.set(), not used by the "python" mesher)
         """
 
         self.level_name = "chunk"
@@ -38,6 +46,12 @@ class Chunk:
         self.area = self.left * self.right * self.height
         self.uvs_face = []
         self.blocks = 0
+        self.mesher = mesher
+        self.vertex_uvs = None
+        self.normals = None
+        self.vertex_tiles = None
+        self.cache = cache
+        self.voxels = VoxelChunk.from_shematic(shematic, max_depth) if voxels is True else voxels or None
         
         # Texture atlas locations
         self.atlas_map = atlas_map
@@ -61,11 +75,35 @@ class Chunk:
             self.BD = 0.0000099  # border_deficiency
             self.ONE = 1 - self.BD
 
-        self.vertices, self.triangles, uvs, uvs_ind, normals, normals_ind = self.level_maker(self.position)
+        if build:
+            self.build()
 
-        self.vertices = format_vertices(self.vertices, self.triangles)
-        self.vertex_uvs = format_vertices(uvs, uvs_ind)
-        self.normals = format_vertices(normals, normals_ind)
+    def build(self, neighbours=None):
+        """
+        Builds chunk vertices, uvs and normals with the chunk mesher
+
+        Args:
+            neighbours (dict): {"+X": Chunk, "-X": Chunk, "+Z": Chunk, "-Z": Chunk} for "culled" / "greedy" seams
+        """
+
+        if self.cache is not None:
+            key = chunk_key(self, neighbours)
+            if not load_cached(self.cache, [self], [key]):
+                return
+
+        if self.mesher == "python":
+            self.vertices, self.triangles, uvs, uvs_ind, normals, normals_ind = self.level_maker(self.position)
+
+            self.vertices = format_vertices(self.vertices, self.triangles)
+            self.vertex_uvs = format_vertices(uvs, uvs_ind)
+            self.normals = format_vertices(normals, normals_ind)
+        elif self.mesher == "greedy":
+            split_chunks([self], *greedy_chunks([self], [neighbours]))
+        else:
+            split_chunks([self], *mesh_chunks([self], [neighbours]))
+
+        if self.cache is not None:
+            save_cached(self.cache, [self], [key])
     
     def level_maker(self, center):
         """
@@ -1,6 +1,7 @@
 from pygame import Vector3
 from main.Level.module_3dicu_v0_1_1_beta.Chunk import *
 from main.Level.module_3dicu_v0_1_1_beta.Shematic import Shematic
+from main.Level.module_3dicu_v0_1_1_beta.Mesher import mesh_chunks, greedy_chunks, mesh_parallel, split_chunks, chunk_key, load_cached, save_cached, NEIGHBOURS
 
 
 class ChunkAttach:
@@ -9,14 +10,20 @@ class ChunkAttach:
     - Making Trains !
     """
 
-    def __init__(self, startX=0, startY=0, startZ=0, numberx=1, numberz=1, max_depth=1, shader=None, texture=None, atlas_map=None, custom_shematic=None) -> None:
+    def __init__(self, startX=0, startY=0, startZ=0, numberx=1, numberz=1, max_depth=1, shader=None, texture=None, atlas_map=None, custom_shematic=None, mesher="numpy", workers=None, cache=None, voxels=False) -> None:
         """
         Multiple chunk maker.
 
         atlas_map: (tuple): atlas texture mapping information (L, H, HMF, HML, VMF, VML)
+        mesher: (str): "numpy" (whole terrain in one pass), "culled" (faces next to air only, seams included),
+            "greedy" (culled + merged quads, needs the atlas shader) or "python" (chunk by chunk)
+        workers: (int): mesh on a process pool with this many processes (None: main process)
+        cache: (main.Engine2.Cache.MeshCache): on-disk mesh cache, only chunks missing in it are meshed
+        voxels: (bool): chunks keep a voxel store (Voxels.VoxelChunk) built from the shematic
         """
         print("Attaching Chunks...")
         self.terrain = []
+        self.chunk_map = {}  # (x, z): Chunk
         self.shader = shader
         self.texture = texture
         self.sx = startX
@@ -28,15 +35,55 @@ class ChunkAttach:
         self.custom_shematic = custom_shematic
         self.max_depth = max_depth
         self.atlas_map = atlas_map
+        self.mesher = mesher
+        self.workers = workers
+        self.cache = cache
+        self.voxels = voxels
 
-        
         self.load_terrain()
 
     def load_terrain(self):
         print("Building Chunks (Multiple Level.Chunk Callings)...")
+        build = self.mesher == "python"
         for x in range(self.sx, self.endx, 8):
             for z in range(self.sz, self.endz, 8):
                 if self.custom_shematic is None:
-                    self.terrain.append(Chunk(Vector3(x, 0, z), shematic=self.shematic.locate(x, z)))
+                    self.terrain.append(Chunk(Vector3(x, 0, z), shematic=self.shematic.locate(x, z), mesher=self.mesher, build=build, cache=self.cache, voxels=self.voxels))
                 else:
-                    self.terrain.append(Chunk(Vector3(x, 0, z), shematic=self.custom_shematic, max_depth=self.max_depth, atlas_map=self.atlas_map))
+                    self.terrain.append(Chunk(Vector3(x, 0, z), shematic=self.custom_shematic, max_depth=self.max_depth, atlas_map=self.atlas_map, mesher=self.mesher, build=build, cache=self.cache, voxels=self.voxels))
+
+        for chunk in self.terrain:
+            self.chunk_map[(int(chunk.position.x), int(chunk.position.z))] = chunk
+
+        if not build:
+            chunks = self.terrain
+            neighbours = [self.neighbours(chunk) for chunk in self.terrain]
+
+            if self.cache is not None:
+                keys = [chunk_key(chunk, n) for chunk, n in zip(chunks, neighbours)]
+                missing = load_cached(self.cache, chunks, keys)
+                chunks = [chunks[i] for i in missing]
+                neighbours = [neighbours[i] for i in missing]
+                keys = [keys[i] for i in missing]
+
+            if chunks:
+                self.mesh_terrain(chunks, neighbours)
+
+            if self.cache is not None:
+                save_cached(self.cache, chunks, keys)
+
+    def mesh_terrain(self, chunks, neighbours):
+        if self.workers is not None and self.workers > 1:
+            split_chunks(chunks, *mesh_parallel(chunks, neighbours, self.workers))
+        elif self.mesher == "greedy":
+            split_chunks(chunks, *greedy_chunks(chunks, neighbours))
+        else:
+            split_chunks(chunks, *mesh_chunks(chunks, neighbours))
+
+    def neighbours(self, chunk):
+        """
+        Neighbour chunks of a chunk in self.terrain ({"+X": Chunk or None, ...})
+        """
+
+        x, z = int(chunk.position.x), int(chunk.position.z)
+        return {direction: self.chunk_map.get((x + dx * 8, z + dz * 8)) for direction, (dx, dz) in NEIGHBOURS.items()}
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import numpy as np
+from pygame import Vector3
+from main.Engine2.Mesh import Mesh
+from main.Engine2.Texture import Texture
+from main.Engine2.Settings2 import *
+from main.Level.module_3dicu_v0_1_1_beta.Chunk import Chunk
+from main.Level.module_3dicu_v0_1_1_beta.Shematic import Shematic
+from main.Level.module_3dicu_v0_1_1_beta.Mesher import NEIGHBOURS
+
+
+class ChunkStream:
+    """
+    Streams chunks around the camera !
+    - Loads chunks inside the render radius, nearest first
+    - Evicts least recently visible chunks above the cache size
+    - occlusion: chunks hidden by the terrain are kept but not drawn
+    - spatial: uploaded chunk meshes are kept in a Spatial.SpatialIndex grid
+    """
+
+    def __init__(self, shader=None, image=None, atlas_map=None, mesher="culled", max_depth=-13,
+                 render_radius=STREAM_RENDER_RADIUS, cache_chunks=STREAM_CACHE_CHUNKS,
+                 upload_budget=STREAM_UPLOAD_BUDGET, shematic=None, cache=None, compact=False,
+                 occlusion=None, spatial=None, voxels=False) -> None:
+        """
+        Camera driven chunk streaming.
+
+        render_radius: (int): chunks around the camera chunk that are drawn
+        cache_chunks: (int): uploaded chunks kept (LRU eviction above it)
+        upload_budget: (int): chunks built and uploaded per update (frame)
+        mesher: (str): Chunk mesher ("greedy" needs the atlas shader)
+        cache: (main.Engine2.Cache.MeshCache): on-disk mesh cache
+        compact: (bool): upload chunks in the compact vertex format (Mesh compact)
+        occlusion: (main.Engine2.Horizon.HorizonCuller): terrain occlusion culling of chunks
+        spatial: (main.Engine2.Spatial.SpatialIndex): scene index the chunk meshes register with
+        voxels: (bool): mesh chunks from voxel stores (Voxels.VoxelChunk) built from the shematic
+        """
+        print("Streaming Chunks...")
+        self.shader = shader
+        self.texture = Texture(image) if image is not None else None
+        self.atlas_map = atlas_map
+        self.mesher = mesher
+        self.max_depth = max_depth
+        self.render_radius = render_radius
+        self.cache_chunks = max(cache_chunks, (2 * render_radius + 1) ** 2)
+        self.upload_budget = upload_budget
+        self.cache = cache
+        self.compact = compact
+        self.occlusion = occlusion
+        self.spatial = spatial
+        self.voxels = voxels
+        self.shematic = shematic if shematic is not None else Shematic(1)
+        self.meshes = OrderedDict()  # (x, z): Mesh, least recently visible first
+        self.visible = []  # (x, z) keys drawn this frame
+        self.uploads = 0  # chunks uploaded last update
+
+    def chunk(self, key, build=False):
+        x, z = key
+        return Chunk(Vector3(x, 0, z), shematic=self.shematic.locate(x, z), max_depth=self.max_depth,
+                     atlas_map=self.atlas_map, mesher=self.mesher, build=build, cache=self.cache,
+                     voxels=self.voxels)
+
+    def inside(self, key):
+        x, z = key
+        size_x, size_z = self.shematic.terrain_shematic.shape[:2]
+        return 0 <= x <= size_x - 8 and 0 <= z <= size_z - 8
+
+    def wanted(self, camera):
+        """
+        Chunk keys inside the render radius, nearest first
+        """
+
+        camera_x = camera.transformation[0, 3]
+        camera_z = camera.transformation[2, 3]
+        center_x = int(round(camera_x / 8)) * 8
+        center_z = int(round(camera_z / 8)) * 8
+
+        steps = np.arange(-self.render_radius, self.render_radius + 1) * 8
+        xs, zs = np.meshgrid(center_x + steps, center_z + steps, indexing="ij")
+        distances = (xs - camera_x) ** 2 + (zs - camera_z) ** 2
+        inside = distances <= (self.render_radius * 8) ** 2
+        order = np.argsort(distances[inside], kind="stable")
+        keys = zip(xs[inside][order].tolist(), zs[inside][order].tolist())
+        return [key for key in keys if self.inside(key)]
+
+    def load(self, key):
+        chunk = self.chunk(key)
+        neighbours = {}
+        for direction, (dx, dz) in NEIGHBOURS.items():
+            n_key = (key[0] + dx * 8, key[1] + dz * 8)
+            neighbours[direction] = self.chunk(n_key) if self.inside(n_key) else None
+        chunk.build(neighbours)
+        return self.upload(chunk.vertices, chunk.vertex_uvs, chunk.normals, chunk.vertex_tiles)
+
+    def upload(self, vertices, vertex_uvs, normals, vertex_tiles=None):
+        """
+        Mesh of built chunk arrays (None when empty)
+        """
+
+        if len(vertices) == 0:
+            return None
+
+        return Mesh(vertices=vertices,
+                    vertex_uvs=vertex_uvs,
+                    vertex_normals=normals,
+                    color=(CHUNK_COLOR_R, CHUNK_COLOR_G, CHUNK_COLOR_B),
+                    vertex_tiles=vertex_tiles,
+                    texture=self.texture,
+                    compact=self.compact,
+                    material=self.shader)
+
+    def evict(self, wanted):
+        wanted = set(wanted)
+        while len(self.meshes) > self.cache_chunks:
+            key, mesh = next(iter(self.meshes.items()))
+            if key in wanted:
+                break
+            del self.meshes[key]
+            if mesh is not None:
+                if self.spatial is not None:
+                    self.spatial.remove(mesh)
+                mesh.delete()
+
+    def update(self, camera):
+        """
+        Loads (upload budget) / evicts chunks for the camera position, call once per frame
+        """
+
+        wanted = self.wanted(camera)
+        self.visible = []
+        self.uploads = 0
+
+        for key in wanted:
+            if key not in self.meshes:
+                if self.uploads >= self.upload_budget:
+                    continue
+                self.meshes[key] = self.load(key)
+                self.uploads += 1
+                if self.spatial is not None and self.meshes[key] is not None:
+                    self.spatial.insert(self.meshes[key], *self.meshes[key].bounds, grid=True)
+            self.meshes.move_to_end(key)
+            self.visible.append(key)
+
+        self.evict(wanted)
+
+    def draw(self, camera, light):
+        self.update(camera)
+        meshes = [self.meshes[key] for key in self.visible if self.meshes[key] is not None]
+
+        if self.occlusion is not None and meshes:
+            visible = self.occlusion.visible_boxes(camera, [mesh.bounds[0] for mesh in meshes],
+                                                   [mesh.bounds[1] for mesh in meshes])
+            meshes = [mesh for mesh, shown in zip(meshes, visible) if shown]
+
+        # Chunks share the material: camera / light uniforms are loaded once
+        if meshes:
+            meshes[0].bind_program(camera, light)
+        for mesh in meshes:
+            mesh.draw_bound(camera)
@@ -0,0 +1,650 @@
+# This file builds chunk meshes as numpy arrays (whole chunks / whole ChunkAttach in one pass)
+import numpy as np
+from main.Engine2.Workers import run_parallel, split_batches
+from main.Engine2.Cache import MeshCache
+
+# Bump on any change of the mesher output (invalidates cached chunk meshes)
+MESHER_VERSION = 1
+
+# Block faces in formatted order (6 vertices each)
+FACE_UP = 0     # +Y
+FACE_DOWN = 1   # -Y
+FACE_FRONT = 2  # +Z
+FACE_BACK = 3   # -Z
+FACE_LEFT = 4   # -X
+FACE_RIGHT = 5  # +X
+
+# Neighbour chunk directions (chunk steps x, z)
+NEIGHBOURS = {
+    "+X": (1, 0),
+    "-X": (-1, 0),
+    "+Z": (0, 1),
+    "-Z": (0, -1)
+}
+
+# Block corners (x, y, z) as low(0) / high(1) sides:
+# TLU, TLD, TRU, TRD, BLU, BLD, BRU, BRD
+BLOCK_CORNERS = np.array([
+    (0, 1, 0), (0, 1, 1), (1, 1, 0), (1, 1, 1),
+    (0, 0, 0), (0, 0, 1), (1, 0, 0), (1, 0, 1)
+])
+
+# Block triangles (corner index per formatted vertex, 12 triangles)
+BLOCK_TRIANGLES = np.array([
+    0, 1, 2, 2, 1, 3,  # TRIANGLE 1, 2
+    4, 5, 6, 6, 5, 7,  # TRIANGLE 3, 4
+    1, 5, 3, 3, 5, 7,  # TRIANGLE 5, 6
+    0, 4, 2, 2, 4, 6,  # TRIANGLE 7, 8
+    4, 0, 5, 5, 0, 1,  # TRIANGLE 9, 10
+    6, 2, 7, 7, 2, 3   # TRIANGLE 11, 12
+])
+
+# Block uv triangles (uvs_face index per formatted vertex)
+BLOCK_UV_TRIANGLES = np.array([
+    20, 21, 22, 22, 21, 23,
+    4, 5, 6, 6, 5, 7,
+    8, 9, 10, 10, 9, 11,
+    16, 17, 18, 18, 17, 19,
+    0, 1, 2, 2, 1, 3,
+    12, 13, 14, 14, 13, 15
+])
+
+# uvs_face[i] uses (HM_L if i % 2 else HM_F, VM_L if i // 2 % 2 else VM_F)
+BLOCK_UV_H = BLOCK_UV_TRIANGLES % 2
+BLOCK_UV_V = BLOCK_UV_TRIANGLES // 2 % 2
+
+# Normal axis and uv (h, v) axes of every face (x = 0, y = 1, z = 2)
+FACE_NORMAL_AXES = np.array([1, 1, 2, 2, 0, 0])
+FACE_UV_AXES = np.array([(2, 0), (2, 0), (1, 0), (1, 0), (1, 2), (1, 2)])
+
+# Block normals (formatted, 6 vertices per face)
+BLOCK_NORMALS = np.repeat(np.array([
+    (0.0, 0.0, 1.0), (0.0, 1.0, 0.0), (0.0, 0.0, -1.0),
+    (0.0, -1.0, 0.0), (1.0, 0.0, 0.0), (-1.0, 0.0, 0.0)
+], np.float32), 6, axis=0)
+
+# Default atlas tiles by depth (HM_F, HM_L, VM_F, VM_L)
+TILE_SAND = (0, 1, 2, 3)   # DEPTH <= -5
+TILE_DIRT = (0, 1, 1, 2)   # -4 <= DEPTH < 0
+TILE_GRASS = (9, 10, 15, 16)  # 0 <= DEPTH < 15
+TILE_SNOW = (15, 16, 15, 16)  # DEPTH >= 15
+
+# Block types (voxel ids) and their default atlas tiles
+BLOCK_AIR = 0
+BLOCK_SAND = 1
+BLOCK_DIRT = 2
+BLOCK_GRASS = 3
+BLOCK_SNOW = 4
+BLOCK_TILES = np.array([(0, 0, 0, 0), TILE_SAND, TILE_DIRT, TILE_GRASS, TILE_SNOW])
+
+
+def column_heights(shematic) -> np.ndarray:
+    """
+    Column heights of a chunk shematic as [ROW][COLUMN] integers (shematic is [COLUMN][ROW])
+    """
+
+    shematic = np.asarray(shematic)
+    shematic = shematic.reshape(shematic.shape[0], shematic.shape[1])
+    return np.trunc(shematic.T).astype(np.int64)
+
+
+def column_ranges(chunk, neighbours=None):
+    """
+    Filled depth range (low, high) of every column plus a one column border from neighbour chunks
+
+    Args:
+        chunk (Chunk): chunk
+        neighbours (dict): {"+X": Chunk, "-X": Chunk, "+Z": Chunk, "-Z": Chunk}, missing = air
+
+    Returns:
+        low, high (np.ndarray): [ROW + 1][COLUMN + 1] padded ranges (low > high = air)
+    """
+
+    heights = column_heights(chunk.shematic)
+    rows, columns = heights.shape
+    low = np.ones((rows + 2, columns + 2), np.int64)
+    high = np.zeros((rows + 2, columns + 2), np.int64)
+    low[1:-1, 1:-1] = chunk.max_depth
+    high[1:-1, 1:-1] = heights
+
+    if neighbours is None:
+        return low, high
+
+    # (neighbour slice, padded border slice)
+    borders = {
+        "+X": ((slice(None), 0), (slice(1, -1), -1)),
+        "-X": ((slice(None), -1), (slice(1, -1), 0)),
+        "+Z": ((0, slice(None)), (-1, slice(1, -1))),
+        "-Z": ((-1, slice(None)), (0, slice(1, -1)))
+    }
+
+    for direction, (source, target) in borders.items():
+        neighbour = neighbours.get(direction)
+        if neighbour is None:
+            continue
+        n_heights = column_heights(neighbour.shematic)
+        low[target] = neighbour.max_depth
+        high[target] = n_heights[source]
+
+    return low, high
+
+
+def visible_faces(chunk, rows, columns, depths, neighbours=None) -> np.ndarray:
+    """
+    Faces of every block that touch air (blocks x 6, formatted face order)
+    """
+
+    if chunk.voxels is not None or any(n is not None and n.voxels is not None for n in (neighbours or {}).values()):
+        return voxel_faces(chunk, rows, columns, depths, neighbours)
+
+    low, high = column_ranges(chunk, neighbours)
+    rows = rows + 1
+    columns = columns + 1
+    faces = np.empty((len(depths), 6), bool)
+
+    def air(r, c, d):
+        return (d < low[r, c]) | (d > high[r, c])
+
+    faces[:, FACE_UP] = air(rows, columns, depths + 1)
+    faces[:, FACE_DOWN] = air(rows, columns, depths - 1)
+    faces[:, FACE_FRONT] = air(rows + 1, columns, depths)
+    faces[:, FACE_BACK] = air(rows - 1, columns, depths)
+    faces[:, FACE_LEFT] = air(rows, columns - 1, depths)
+    faces[:, FACE_RIGHT] = air(rows, columns + 1, depths)
+    return faces
+
+
+def depth_blocks(depths) -> np.ndarray:
+    """
+    Default block types for block depths
+    """
+
+    return np.select([depths <= -5, depths < 0, depths < 15], [BLOCK_SAND, BLOCK_DIRT, BLOCK_GRASS], BLOCK_SNOW)
+
+
+def depth_tiles(depths) -> np.ndarray:
+    """
+    Default atlas tiles (HM_F, HM_L, VM_F, VM_L) for block depths
+    """
+
+    return BLOCK_TILES[depth_blocks(depths)]
+
+
+def chunk_tiles(chunk, rows, columns, depths) -> np.ndarray:
+    """
+    Atlas tiles (HM_F, HM_L, VM_F, VM_L) of chunk blocks (voxel chunks: by block type)
+    """
+
+    if chunk.atlas_map is not None:
+        return np.tile(chunk.atlas_map[2:6], (len(depths), 1))
+    if chunk.voxels is not None:
+        return BLOCK_TILES[chunk.voxels.blocks()[rows, columns, depths - chunk.voxels.bottom]]
+    return depth_tiles(depths)
+
+
+def chunk_occupancy(chunk, bottom, top) -> np.ndarray:
+    """
+    Solid blocks of a chunk as [ROW][COLUMN][DEPTH] for depths bottom..top
+    """
+
+    if chunk.voxels is not None:
+        return chunk.voxels.occupancy(bottom, top)
+
+    heights = column_heights(chunk.shematic)
+    depths = np.arange(bottom, top + 1)
+    return (depths >= chunk.max_depth) & (depths <= heights[..., None])
+
+
+def voxel_faces(chunk, rows, columns, depths, neighbours=None) -> np.ndarray:
+    """
+    visible_faces() of voxel chunks (or next to voxel chunks): air lookups in a padded occupancy grid
+    """
+
+    bottom = int(depths.min()) - 1
+    top = int(depths.max()) + 1
+    solid = chunk_occupancy(chunk, bottom, top)
+    grid = np.zeros((solid.shape[0] + 2, solid.shape[1] + 2, solid.shape[2]), bool)
+    grid[1:-1, 1:-1] = solid
+
+    # (neighbour slice, padded border slice)
+    borders = {
+        "+X": ((slice(None), 0), (slice(1, -1), -1)),
+        "-X": ((slice(None), -1), (slice(1, -1), 0)),
+        "+Z": ((0, slice(None)), (-1, slice(1, -1))),
+        "-Z": ((-1, slice(None)), (0, slice(1, -1)))
+    }
+
+    for direction, (source, target) in borders.items():
+        neighbour = (neighbours or {}).get(direction)
+        if neighbour is not None:
+            grid[target] = chunk_occupancy(neighbour, bottom, top)[source]
+
+    rows = rows + 1
+    columns = columns + 1
+    depths = depths - bottom
+    faces = np.empty((len(depths), 6), bool)
+    faces[:, FACE_UP] = ~grid[rows, columns, depths + 1]
+    faces[:, FACE_DOWN] = ~grid[rows, columns, depths - 1]
+    faces[:, FACE_FRONT] = ~grid[rows + 1, columns, depths]
+    faces[:, FACE_BACK] = ~grid[rows - 1, columns, depths]
+    faces[:, FACE_LEFT] = ~grid[rows, columns - 1, depths]
+    faces[:, FACE_RIGHT] = ~grid[rows, columns + 1, depths]
+    return faces
+
+
+def chunk_blocks(chunk):
+    """
+    Blocks of a chunk in level_maker order (ROW, COLUMN, DEPTH)
+
+    Returns:
+        rows, columns, depths (np.ndarray)
+    """
+
+    if chunk.voxels is not None:
+        rows, columns, depths = np.nonzero(chunk.voxels.blocks() != BLOCK_AIR)
+        return rows, columns, depths + chunk.voxels.bottom
+
+    heights = column_heights(chunk.shematic)
+    counts = np.maximum(heights - chunk.max_depth + 1, 0).ravel()
+    rows, columns = np.indices(heights.shape)
+    rows = np.repeat(rows.ravel(), counts)
+    columns = np.repeat(columns.ravel(), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    depths = chunk.max_depth + np.arange(counts.sum()) - starts
+    return rows, columns, depths
+
+
+def block_vertices(x0, x1, y0, y1, z0, z1) -> np.ndarray:
+    """
+    Formatted block vertices from block bounds (one entry per block)
+    """
+
+    xs = np.stack((x0, x1), axis=-1).astype(np.float32)
+    ys = np.stack((y0, y1), axis=-1).astype(np.float32)
+    zs = np.stack((z0, z1), axis=-1).astype(np.float32)
+    corners = BLOCK_CORNERS[BLOCK_TRIANGLES]
+    return np.stack((xs[:, corners[:, 0]], ys[:, corners[:, 1]], zs[:, corners[:, 2]]), axis=-1)
+
+
+def block_uvs(tiles, atlas_length, atlas_height, one) -> np.ndarray:
+    """
+    Formatted block uvs from atlas tiles (HM_F, HM_L, VM_F, VM_L) (one entry per block)
+    """
+
+    tiles = np.asarray(tiles, np.float64)
+    us = (one / atlas_length * tiles[:, 0:2]).astype(np.float32)
+    vs = (one / atlas_height * tiles[:, 2:4]).astype(np.float32)
+    return np.stack((us[:, BLOCK_UV_H], vs[:, BLOCK_UV_V]), axis=-1)
+
+
+def block_normals(count) -> np.ndarray:
+    """
+    Formatted block normals
+    """
+
+    return np.broadcast_to(BLOCK_NORMALS, (count, 36, 3))
+
+
+def downsample_heights(terrain, i, j, size, columns=8):
+    """
+    Heightmap region [i:i + size][j:j + size] downsampled to columns x columns mean column heights
+
+    Returns:
+        heights (np.ndarray int64), filled (np.ndarray bool): [COLUMN][ROW], columns outside the heightmap unfilled
+    """
+
+    step = size // columns
+    region = np.asarray(terrain[i:i + size, j:j + size], np.float64)
+    region = np.trunc(region.reshape(region.shape[0], region.shape[1]))
+
+    sums = np.zeros((size, size))
+    counts = np.zeros((size, size))
+    sums[:region.shape[0], :region.shape[1]] = region
+    counts[:region.shape[0], :region.shape[1]] = 1
+    sums = sums.reshape(columns, step, columns, step).sum(axis=(1, 3))
+    counts = counts.reshape(columns, step, columns, step).sum(axis=(1, 3))
+
+    heights = np.floor(sums / np.maximum(counts, 1) + 0.5).astype(np.int64)
+    return heights, counts > 0
+
+
+def coarse_faces(heights, filled, max_depth) -> np.ndarray:
+    """
+    Faces of downsampled columns ([COLUMN][ROW] x 6): tops, walls next to lower columns and skirts on every
+    region border (border walls reach max_depth, covering cracks next to regions of other levels)
+    """
+
+    filled = filled & (heights >= max_depth)
+    padded = np.full((heights.shape[0] + 2, heights.shape[1] + 2), np.iinfo(np.int64).min)
+    padded[1:-1, 1:-1] = np.where(filled, heights, np.iinfo(np.int64).min)
+
+    faces = np.zeros(heights.shape + (6,), bool)
+    faces[..., FACE_UP] = True
+    faces[..., FACE_FRONT] = padded[1:-1, 2:] < heights
+    faces[..., FACE_BACK] = padded[1:-1, :-2] < heights
+    faces[..., FACE_LEFT] = padded[:-2, 1:-1] < heights
+    faces[..., FACE_RIGHT] = padded[2:, 1:-1] < heights
+    return faces & filled[..., None]
+
+
+def mesh_coarse(x, z, step, heights, filled, max_depth, atlas_map=None):
+    """
+    Builds vertices, uvs and normals of a downsampled region (every column a step x step block stack)
+
+    Args:
+        x, z (int): world corner (minimum x, minimum z) of the region
+        step (int): blocks per column side
+        heights, filled (np.ndarray): downsample_heights() output
+        max_depth (int): region maximum depth
+        atlas_map (tuple): atlas texture mapping information (L, H, HMF, HML, VMF, VML), None: depth tiles
+
+    Returns:
+        vertices, vertex_uvs, normals (np.ndarray): formatted
+    """
+
+    faces = coarse_faces(heights, filled, max_depth)
+    columns, rows = np.nonzero(faces.any(axis=-1))
+    faces = faces[columns, rows]
+    tops = heights[columns, rows]
+
+    x0 = x + columns * step
+    z0 = z + rows * step
+    vertices = block_vertices(x0, x0 + step, np.full(len(tops), max_depth - 1), tops, z0, z0 + step)
+
+    one = 1 - 0.0000099
+    if atlas_map is None:
+        uvs = block_uvs(depth_tiles(tops), 15.9999991, 15.9999991, one)
+    else:
+        uvs = block_uvs(np.tile(atlas_map[2:6], (len(tops), 1)), atlas_map[0], atlas_map[1], one)
+
+    normals = block_normals(len(tops))
+    vertices = vertices.reshape(-1, 6, 6, 3)[faces]
+    uvs = uvs.reshape(-1, 6, 6, 2)[faces]
+    normals = normals.reshape(-1, 6, 6, 3)[faces]
+    return vertices.reshape(-1, 3), uvs.reshape(-1, 2), normals.reshape(-1, 3)
+
+
+def mesh_chunks(chunks, neighbours=None):
+    """
+    Builds vertices, uvs and normals of multiple chunks in one pass
+
+    Args:
+        chunks (list[Chunk]): chunks (position, shematic, max_depth, atlas settings and mesher are used)
+        neighbours (list[dict]): neighbour chunks of every chunk (only used by "culled" chunks)
+
+    Returns:
+        vertices, vertex_uvs, normals (np.ndarray), counts (list[int]): formatted vertices per chunk
+    """
+
+    x0, x1, y0, y1, z0, z1, tiles, lengths, heights, ones = [], [], [], [], [], [], [], [], [], []
+    faces = []
+    counts = []
+
+    for i, chunk in enumerate(chunks):
+        rows, columns, depths = chunk_blocks(chunk)
+        chunk.blocks = len(depths)
+
+        if chunk.mesher == "culled":
+            c_faces = visible_faces(chunk, rows, columns, depths, None if neighbours is None else neighbours[i])
+            shown = c_faces.any(axis=1)
+            rows, columns, depths, c_faces = rows[shown], columns[shown], depths[shown], c_faces[shown]
+        else:
+            c_faces = np.ones((len(depths), 6), bool)
+
+        faces.append(c_faces)
+        counts.append(int(c_faces.sum()) * 6)
+
+        x0.append(chunk.position.x - (4 - columns))
+        x1.append(chunk.position.x - (3 - columns))
+        z0.append(chunk.position.z - (4 - rows))
+        z1.append(chunk.position.z - (3 - rows))
+        y0.append(depths - 1)
+        y1.append(depths)
+
+        tiles.append(chunk_tiles(chunk, rows, columns, depths))
+        lengths.append(np.full(len(depths), chunk.atlas_length, np.float64))
+        heights.append(np.full(len(depths), chunk.atlas_height, np.float64))
+        ones.append(np.full(len(depths), chunk.ONE, np.float64))
+
+    if not counts or sum(counts) == 0:
+        empty = np.zeros((0, 3), np.float32)
+        return empty, np.zeros((0, 2), np.float32), empty.copy(), counts
+
+    vertices = block_vertices(*[np.concatenate(axis) for axis in (x0, x1, y0, y1, z0, z1)])
+    ones = np.concatenate(ones)[:, None]
+    uvs = block_uvs(np.concatenate(tiles), np.concatenate(lengths)[:, None],
+                    np.concatenate(heights)[:, None], ones)
+    normals = block_normals(len(vertices))
+    faces = np.concatenate(faces)
+
+    if faces.all():
+        return vertices.reshape(-1, 3), uvs.reshape(-1, 2), normals.reshape(-1, 3), counts
+
+    vertices = vertices.reshape(-1, 6, 6, 3)[faces]
+    uvs = uvs.reshape(-1, 6, 6, 2)[faces]
+    normals = normals.reshape(-1, 6, 6, 3)[faces]
+    return vertices.reshape(-1, 3), uvs.reshape(-1, 2), normals.reshape(-1, 3), counts
+
+
+def greedy_rectangles(grid):
+    """
+    Merges equal cells of a 2D tile grid (-1 = empty) into rectangles
+
+    Returns:
+        list[tuple]: (i, j, size_i, size_j, tile)
+    """
+
+    grid = grid.tolist()
+    size_i, size_j = len(grid), len(grid[0])
+    rectangles = []
+
+    for i in range(size_i):
+        row = grid[i]
+        for j in range(size_j):
+            tile = row[j]
+            if tile < 0:
+                continue
+
+            width = 1
+            while j + width < size_j and row[j + width] == tile:
+                width += 1
+
+            height = 1
+            while i + height < size_i and grid[i + height][j:j + width] == [tile] * width:
+                height += 1
+
+            for merged in grid[i:i + height]:
+                merged[j:j + width] = [-1] * width
+            rectangles.append((i, j, height, width, tile))
+
+    return rectangles
+
+
+def greedy_chunks(chunks, neighbours=None):
+    """
+    Builds merged (greedy) quads of multiple chunks, faces next to air only
+
+    Coplanar faces sharing an atlas tile become one quad. vertex_uvs are in tile units
+    (0..quad size) and vertex_tiles hold the atlas tile (u_first, v_first, u_last, v_last),
+    the atlas shader repeats the tile over the quad.
+
+    Returns:
+        vertices, vertex_uvs, normals, counts (list[int]), vertex_tiles (np.ndarray)
+    """
+
+    lows, sizes, quad_faces, rects, counts = [], [], [], [], []
+
+    for i, chunk in enumerate(chunks):
+        rows, columns, depths = chunk_blocks(chunk)
+        chunk.blocks = len(depths)
+        if len(depths) == 0:
+            counts.append(0)
+            continue
+
+        faces = visible_faces(chunk, rows, columns, depths, None if neighbours is None else neighbours[i])
+        tiles, tile_ids = np.unique(chunk_tiles(chunk, rows, columns, depths), axis=0, return_inverse=True)
+        tile_ids = tile_ids.ravel()
+        tiles = np.asarray(tiles, np.float64)
+        tile_rects = np.stack((chunk.ONE / chunk.atlas_length * tiles[:, 0], chunk.ONE / chunk.atlas_height * tiles[:, 2],
+                               chunk.ONE / chunk.atlas_length * tiles[:, 1], chunk.ONE / chunk.atlas_height * tiles[:, 3]),
+                              axis=-1)
+
+        # Block grid positions (x, y, z)
+        bottom = depths.min()
+        cells = np.stack((columns, depths - bottom, rows), axis=-1)
+        shape = tuple(cells.max(axis=0) + 1)
+        origin = np.array((chunk.position.x - 4, bottom - 1, chunk.position.z - 4), np.float64)
+        c_lows, c_tiles = [], []
+
+        for face in range(6):
+            shown = faces[:, face]
+            if not shown.any():
+                continue
+
+            normal, (axis_h, axis_v) = int(FACE_NORMAL_AXES[face]), FACE_UV_AXES[face].tolist()
+            volume = np.full(shape, -1, np.int64)
+            volume[tuple(cells[shown].T)] = tile_ids[shown]
+            volume = volume.transpose(normal, axis_h, axis_v)
+
+            for layer in range(volume.shape[0]):
+                if (volume[layer] < 0).all():
+                    continue
+                for h, v, size_h, size_v, tile in greedy_rectangles(volume[layer]):
+                    low = [0, 0, 0]
+                    size = [1, 1, 1]
+                    low[normal], low[axis_h], low[axis_v] = layer, h, v
+                    size[axis_h], size[axis_v] = size_h, size_v
+                    c_lows.append(low)
+                    sizes.append(size)
+                    quad_faces.append(face)
+                    c_tiles.append(tile)
+
+        counts.append(len(c_tiles) * 6)
+        if c_tiles:
+            lows.append(origin + np.array(c_lows))
+            rects.append(tile_rects[c_tiles])
+
+    if not lows:
+        empty = np.zeros((0, 3), np.float32)
+        return empty, np.zeros((0, 2), np.float32), empty.copy(), counts, np.zeros((0, 4), np.float32)
+
+    lows, sizes, quad_faces, rects = np.concatenate(lows), np.array(sizes), np.array(quad_faces), np.concatenate(rects)
+    vertex_ids = quad_faces[:, None] * 6 + np.arange(6)  # formatted block vertex of every quad vertex
+    corners = BLOCK_CORNERS[BLOCK_TRIANGLES[vertex_ids]]
+    vertices = lows[:, None] + corners * sizes[:, None]
+
+    uv_axes = FACE_UV_AXES[quad_faces]
+    size_h = np.take_along_axis(sizes, uv_axes[:, 0:1], axis=1)
+    size_v = np.take_along_axis(sizes, uv_axes[:, 1:2], axis=1)
+    uvs = np.stack((BLOCK_UV_H[vertex_ids] * size_h, BLOCK_UV_V[vertex_ids] * size_v), axis=-1)
+
+    normals = BLOCK_NORMALS[vertex_ids]
+    vertex_tiles = np.repeat(rects, 6, axis=0)
+
+    return (vertices.reshape(-1, 3).astype(np.float32), uvs.reshape(-1, 2).astype(np.float32),
+            normals.reshape(-1, 3), counts, vertex_tiles.astype(np.float32))
+
+
+def split_chunks(chunks, vertices, uvs, normals, counts, vertex_tiles=None) -> None:
+    """
+    Hands mesh_chunks / greedy_chunks output back to every chunk
+    """
+
+    offsets = np.cumsum(counts)[:-1]
+    for chunk, c_vertices, c_uvs, c_normals in zip(chunks, np.split(vertices, offsets),
+                                                   np.split(uvs, offsets), np.split(normals, offsets)):
+        chunk.vertices = c_vertices
+        chunk.vertex_uvs = c_uvs
+        chunk.normals = c_normals
+
+    if vertex_tiles is not None:
+        for chunk, c_tiles in zip(chunks, np.split(vertex_tiles, offsets)):
+            chunk.vertex_tiles = c_tiles
+
+
+def mesh_batch(chunks, neighbours):
+    """
+    Process pool task: meshes a batch of chunks (counts are returned as an array)
+    """
+
+    if chunks[0].mesher == "greedy":
+        vertices, uvs, normals, counts, vertex_tiles = greedy_chunks(chunks, neighbours)
+        return vertices, uvs, normals, np.array(counts, np.int64), vertex_tiles
+
+    vertices, uvs, normals, counts = mesh_chunks(chunks, neighbours)
+    return vertices, uvs, normals, np.array(counts, np.int64)
+
+
+def mesh_parallel(chunks, neighbours, workers):
+    """
+    mesh_chunks / greedy_chunks over a process pool
+
+    Chunks are meshed independently, so the output does not depend on the worker count.
+    """
+
+    indices = split_batches(list(range(len(chunks))), workers * 4)
+    tasks = [([chunks[i] for i in batch], [neighbours[i] for i in batch]) for batch in indices]
+    results = run_parallel(mesh_batch, tasks, workers)
+
+    vertices, uvs, normals = [np.concatenate([result[i] for result in results]) for i in range(3)]
+    counts = np.concatenate([result[3] for result in results]).tolist()
+
+    if chunks[0].mesher == "greedy":
+        return vertices, uvs, normals, counts, np.concatenate([result[4] for result in results])
+    return vertices, uvs, normals, counts
+
+
+def chunk_key(chunk, neighbours=None):
+    """
+    Mesh cache key of a chunk (schematic slice, generator parameters and mesher version)
+    """
+
+    parts = [MESHER_VERSION, chunk.mesher, tuple(chunk.position), chunk.max_depth, chunk.atlas_length, chunk.atlas_height,
+             chunk.HM_F, chunk.HM_L, chunk.VM_F, chunk.VM_L, chunk.ONE, np.asarray(chunk.shematic)]
+    if chunk.voxels is not None:
+        parts += chunk.voxels.key_parts()
+
+    # Culled faces depend on the neighbour columns
+    if chunk.mesher in ("culled", "greedy"):
+        for direction in NEIGHBOURS:
+            neighbour = (neighbours or {}).get(direction)
+            if neighbour is None:
+                parts.append(None)
+            else:
+                parts += [neighbour.max_depth, np.asarray(neighbour.shematic)]
+                if neighbour.voxels is not None:
+                    parts += neighbour.voxels.key_parts()
+
+    return MeshCache.key(*parts)
+
+
+def load_cached(cache, chunks, keys):
+    """
+    Hands cached meshes to chunks
+
+    Returns:
+        list[int]: indices of chunks missing in the cache
+    """
+
+    missing = []
+    for i, (chunk, key) in enumerate(zip(chunks, keys)):
+        entry = cache.load(key)
+        if entry is None:
+            missing.append(i)
+            continue
+
+        chunk.vertices = entry["vertices"]
+        chunk.vertex_uvs = entry["vertex_uvs"]
+        chunk.normals = entry["normals"]
+        chunk.vertex_tiles = entry.get("vertex_tiles")
+        chunk.blocks = int(entry["blocks"])
+
+    return missing
+
+
+def save_cached(cache, chunks, keys) -> None:
+    for chunk, key in zip(chunks, keys):
+        arrays = dict(vertices=chunk.vertices, vertex_uvs=chunk.vertex_uvs, normals=chunk.normals, blocks=np.array(chunk.blocks))
+        if chunk.vertex_tiles is not None:
+            arrays["vertex_tiles"] = chunk.vertex_tiles
+        cache.save(key, **arrays)
@@ -0,0 +1,94 @@
+import random
+import numpy as np
+
+
+class FractalNoise:
+    """
+    Vectorized gradient noise (fBm)
+    - One layer matches perlin_noise.PerlinNoise(octaves, seed)
+    - Lattice gradients only depend on lattice coordinates, any tile can be made alone (seams match)
+    """
+
+    def __init__(self, octaves=1, seed=100, layers=1, lacunarity=2.0, persistence=0.5) -> None:
+        """
+        Args:
+            octaves (float): lattice cells in each [0, 1] range (PerlinNoise octaves)
+            seed (int): noise seed
+            layers (int): fBm layers (1 = plain PerlinNoise)
+            lacunarity (float): octaves multiplier of every next layer
+            persistence (float): amplitude multiplier of every next layer
+        """
+
+        self.octaves = octaves
+        self.seed = seed
+        self.layers = layers
+        self.lacunarity = lacunarity
+        self.persistence = persistence
+
+    @staticmethod
+    def gradients(seed, lattice_z, lattice_x):
+        """
+        PerlinNoise lattice vectors (seeded by seed * coordinate hash)
+        """
+
+        hashes = np.maximum(1, np.abs(lattice_z + 10 * lattice_x + 1))
+        unique, inverse = np.unique(hashes, return_inverse=True)
+        vectors = np.empty((len(unique), 2))
+
+        for i, value in enumerate(unique.tolist()):
+            generator = random.Random(seed * value)
+            vectors[i] = generator.uniform(-1, 1), generator.uniform(-1, 1)
+
+        vectors = vectors[inverse.reshape(hashes.shape)]
+        return vectors[..., 0], vectors[..., 1]
+
+    @staticmethod
+    def fade(value):
+        return 6 * value ** 5 - 15 * value ** 4 + 10 * value ** 3
+
+    def layer(self, z, x, octaves, seed):
+        """
+        One gradient noise layer at (z, x) noise coordinates
+        """
+
+        z = z * octaves
+        x = x * octaves
+        floor_z = np.floor(z).astype(np.int64)
+        floor_x = np.floor(x).astype(np.int64)
+        result = np.zeros(np.broadcast(z, x).shape)
+
+        for corner_z in (floor_z, floor_z + 1):
+            for corner_x in (floor_x, floor_x + 1):
+                distance_z = z - corner_z
+                distance_x = x - corner_x
+                vector_z, vector_x = self.gradients(seed, corner_z, corner_x)
+                weight = self.fade(1 - np.abs(distance_z)) * self.fade(1 - np.abs(distance_x))
+                result += weight * (vector_z * distance_z + vector_x * distance_x)
+
+        return result
+
+    def __call__(self, z, x):
+        """
+        Noise of coordinate arrays (same coordinates as PerlinNoise([z, x]))
+        """
+
+        z, x = np.broadcast_arrays(np.asarray(z, np.float64), np.asarray(x, np.float64))
+        result = np.zeros(z.shape)
+        octaves = self.octaves
+        amplitude = 1.0
+
+        for i in range(self.layers):
+            result += amplitude * self.layer(z, x, octaves, self.seed + i)
+            octaves *= self.lacunarity
+            amplitude *= self.persistence
+
+        return result
+
+    def tile(self, start_z, start_x, height, width, zpix, xpix):
+        """
+        Noise tile of pixels [start_z:start_z + height, start_x:start_x + width] (pixel / pix coordinates)
+        """
+
+        z = (start_z + np.arange(height)) / zpix
+        x = (start_x + np.arange(width)) / xpix
+        return self(z[:, None], x[None, :])
@@ -1,6 +1,37 @@
+import os
 import numpy as np
 import matplotlib.pyplot as plt
-from perlin_noise import PerlinNoise
+from main.Level.module_3dicu_v0_1_1_beta.Noise import FractalNoise
+
+# World heightmap saves
+SAVE_TEXT = r"Saves\world.txt"
+SAVE_BINARY = r"Saves\world.npy"
+
+# Memory mapped heightmaps shared by every Shematic (path: np.memmap)
+heightmaps = {}
+
+
+def convert_save(text_path=SAVE_TEXT, binary_path=SAVE_BINARY):
+    """
+    One shot converter: text heightmap save -> raw .npy (memory mappable)
+    """
+
+    print("Converting Heightmap...")
+    np.save(binary_path, np.loadtxt(text_path))
+
+
+def load_heightmap(binary_path=SAVE_BINARY, text_path=SAVE_TEXT):
+    """
+    Opens (once) the binary heightmap as a read only memory map, converts the text save if needed
+    """
+
+    if binary_path not in heightmaps:
+        if os.path.exists(text_path) and (not os.path.exists(binary_path) or
+                                          os.path.getmtime(text_path) > os.path.getmtime(binary_path)):
+            convert_save(text_path, binary_path)
+        heightmaps[binary_path] = np.load(binary_path, mmap_mode="r")
+
+    return heightmaps[binary_path]
 
 
 class Shematic:
@@ -13,34 +44,46 @@ class Shematic:
         self.width = self.chunks * 8
         self.height = self.chunks * 8
         # self.terrain_shematic = self.terrain_maker() * 20
+        self.heightmap = SAVE_BINARY  # shared heightmap save (None: own array)
         self.terrain_shematic = self.load_gen()
+
+    def __getstate__(self):
+        # Shared heightmaps are reopened by the receiving process instead of being copied (process pool results)
+        state = self.__dict__.copy()
+        if self.heightmap is not None and heightmaps.get(self.heightmap) is self.terrain_shematic:
+            state["terrain_shematic"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.terrain_shematic is None:
+            self.terrain_shematic = load_heightmap(self.heightmap)
     
-    def terrain_maker(self):
-        noise = PerlinNoise(octaves=4, seed=100)
+    def terrain_maker(self, octaves=4, seed=100, layers=1):
+        noise = FractalNoise(octaves=octaves, seed=seed, layers=layers)
         zpix, xpix = self.height, self.width
-        terrain = np.zeros(shape=(self.height, self.width))
-        
-        for z in range(zpix):
-            for x in range(xpix):       
-                    noise_value = noise([z/zpix, x/xpix])
-                    terrain[z][x] = noise_value
-          
+        terrain = noise.tile(0, 0, zpix, xpix, zpix, xpix)
+
         return terrain.copy()
-    
-    def gen_save(self):
-        noise = PerlinNoise(octaves=35, seed=100)
+
+    def gen_region(self, start_z, start_x, height, width, octaves=35, seed=100, layers=1, zpix=400, xpix=400):
+        """
+        Generates any region of the world heightmap on its own (matches neighbouring regions)
+        """
+
+        noise = FractalNoise(octaves=octaves, seed=seed, layers=layers)
+        return noise.tile(start_z, start_x, height, width, zpix, xpix) * 20
+
+    def gen_save(self, octaves=35, seed=100, layers=1):
         zpix, xpix = 400, 400
         terrain = np.zeros(shape=(800, 800))
-        
-        for z in range(zpix):
-            for x in range(xpix):       
-                    noise_value = noise([z/zpix, x/xpix])
-                    terrain[z][x] = noise_value * 20
-                    
+        terrain[:zpix, :xpix] = self.gen_region(0, 0, zpix, xpix, octaves, seed, layers, zpix, xpix)
+
         np.savetxt("world.txt", terrain)
+        np.save("world.npy", terrain)
         
     def load_gen(self):
-        return np.loadtxt(r"Saves\world.txt")
+        return load_heightmap(self.heightmap)
     
     def locate(self, x, z):
         result = self.terrain_shematic[x:x+8, z:z+8]
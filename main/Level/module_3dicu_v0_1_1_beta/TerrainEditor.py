@@ -0,0 +1,185 @@
+import copy
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from main.Level.module_3dicu_v0_1_1_beta.Voxels import VoxelChunk
+from main.Level.module_3dicu_v0_1_1_beta.Mesher import mesh_chunks, greedy_chunks, split_chunks, column_heights, depth_blocks, BLOCK_AIR
+
+# Journal record: x, y, z, block (int32 each)
+JOURNAL_DTYPE = np.dtype("<i4")
+
+
+class TerrainEditor:
+    """
+    Block edits on a ChunkAttach world !
+    - set_block() / get_block() in world block coordinates, edited chunks switch to voxel stores
+    - Only the edited chunk (plus the neighbour on a border) is remeshed, on a worker thread
+    - Remeshed chunks are swapped into the (dynamic) CellAttach by the next update()
+    - Every edit is appended to a journal file, replay() rebuilds the edits of a session
+    """
+
+    def __init__(self, terrain, world=None, journal=None) -> None:
+        """
+        Args:
+            terrain (ChunkAttach): edited chunks (chunk_map lookups)
+            world (main.Engine2.CellAttach.CellAttach): dynamic cell attach of terrain.terrain (None: chunk arrays only)
+            journal (str): append-only edit journal path (None: no journal)
+        """
+
+        self.terrain = terrain
+        self.world = world
+        self.dirty = {}  # Chunk: None, waiting for a remesh
+        self.job = None  # running remesh (Future)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.journal_path = journal
+        self.journal = open(journal, "ab") if journal is not None else None
+
+    def locate(self, x, z):
+        """
+        Chunk and (row, column) of a world block column, None outside the terrain
+        """
+
+        start_x, start_z = self.terrain.sx - 4, self.terrain.sz - 4
+        chunk_x = self.terrain.sx + (x - start_x) // 8 * 8
+        chunk_z = self.terrain.sz + (z - start_z) // 8 * 8
+        chunk = self.terrain.chunk_map.get((chunk_x, chunk_z))
+        if chunk is None:
+            return None, 0, 0
+        return chunk, z - (chunk_z - 4), x - (chunk_x - 4)
+
+    def get_block(self, x, y, z):
+        """
+        Block type of the block spanning [x, x + 1] x [y, y + 1] x [z, z + 1] (air outside the terrain)
+        """
+
+        chunk, row, column = self.locate(x, z)
+        if chunk is None:
+            return BLOCK_AIR
+
+        depth = y + 1
+        if chunk.voxels is not None:
+            return chunk.voxels.get(row, column, depth)
+
+        height = column_heights(chunk.shematic)[row, column]
+        return int(depth_blocks(np.array(depth))) if chunk.max_depth <= depth <= height else BLOCK_AIR
+
+    def set_block(self, x, y, z, block, journal=True):
+        """
+        Sets the block spanning [x, x + 1] x [y, y + 1] x [z, z + 1], marks its chunk (and border neighbour) dirty
+
+        Returns:
+            bool: False outside the terrain
+        """
+
+        chunk, row, column = self.locate(x, z)
+        if chunk is None:
+            return False
+
+        if chunk.voxels is None:
+            chunk.voxels = VoxelChunk.from_shematic(chunk.shematic, chunk.max_depth)
+        chunk.voxels.set(row, column, y + 1, block)
+
+        self.dirty[chunk] = None
+        neighbours = self.terrain.neighbours(chunk)
+        borders = {"-X": column == 0, "+X": column == chunk.voxels.shape[1] - 1,
+                   "-Z": row == 0, "+Z": row == chunk.voxels.shape[0] - 1}
+        for direction, border in borders.items():
+            if border and neighbours[direction] is not None:
+                self.dirty[neighbours[direction]] = None
+
+        if journal and self.journal is not None:
+            self.journal.write(np.array([x, y, z, block], JOURNAL_DTYPE).tobytes())
+        return True
+
+    def replay(self, path=None):
+        """
+        Applies every journal edit again (not journaled twice)
+
+        Returns:
+            int: replayed edits
+        """
+
+        path = path or self.journal_path
+        if self.journal is not None:
+            self.journal.flush()
+
+        records = np.fromfile(path, JOURNAL_DTYPE).reshape(-1, 4)
+        for x, y, z, block in records.tolist():
+            self.set_block(x, y, z, block, journal=False)
+        return len(records)
+
+    @staticmethod
+    def snapshot(chunk):
+        """
+        Chunk copy the worker can mesh while the original keeps being edited
+        """
+
+        snapshot = copy.copy(chunk)
+        snapshot.voxels = copy.deepcopy(chunk.voxels)
+        return snapshot
+
+    @staticmethod
+    def remesh(chunks, snapshots, neighbours, mesher):
+        """
+        Worker side: meshes the snapshots of chunks
+        """
+
+        if mesher == "greedy":
+            split_chunks(snapshots, *greedy_chunks(snapshots, neighbours))
+        else:
+            split_chunks(snapshots, *mesh_chunks(snapshots, neighbours))
+        return chunks, snapshots
+
+    def update(self):
+        """
+        Swaps finished remeshes in, starts remeshing dirty chunks (call once per frame)
+
+        Returns:
+            int: chunks swapped in
+        """
+
+        swapped = 0
+        if self.job is not None and self.job.done():
+            chunks, snapshots = self.job.result()
+            self.job = None
+            for chunk, snapshot in zip(chunks, snapshots):
+                chunk.vertices = snapshot.vertices
+                chunk.vertex_uvs = snapshot.vertex_uvs
+                chunk.normals = snapshot.normals
+                chunk.vertex_tiles = snapshot.vertex_tiles
+                chunk.blocks = snapshot.blocks
+                if self.world is not None:
+                    self.world.replace(chunk)
+                swapped += 1
+
+        if self.job is None and self.dirty:
+            chunks = list(self.dirty)
+            self.dirty = {}
+            snapshots = {}
+            for chunk in chunks:
+                for neighbour in [chunk] + list(self.terrain.neighbours(chunk).values()):
+                    if neighbour is not None and neighbour not in snapshots:
+                        snapshots[neighbour] = self.snapshot(neighbour)
+
+            neighbours = [{direction: None if neighbour is None else snapshots[neighbour]
+                           for direction, neighbour in self.terrain.neighbours(chunk).items()} for chunk in chunks]
+            self.job = self.executor.submit(self.remesh, chunks, [snapshots[chunk] for chunk in chunks], neighbours,
+                                            self.terrain.mesher)
+
+        if self.journal is not None:
+            self.journal.flush()
+        return swapped
+
+    def close(self):
+        """
+        Remeshes every dirty chunk and waits for it (swapped in), closes the journal
+        """
+
+        self.update()
+        while self.job is not None or self.dirty:
+            if self.job is not None:
+                self.job.result()
+            self.update()
+        self.executor.shutdown()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
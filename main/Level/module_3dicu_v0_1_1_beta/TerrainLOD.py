@@ -0,0 +1,87 @@
+import numpy as np
+from main.Engine2.Settings2 import *
+from main.Level.module_3dicu_v0_1_1_beta.ChunkStream import ChunkStream
+from main.Level.module_3dicu_v0_1_1_beta.Mesher import NEIGHBOURS, downsample_heights, mesh_coarse
+
+
+class TerrainLOD(ChunkStream):
+    """
+    Quadtree terrain LOD !
+    - Splits square heightmap regions near the camera, the smallest (8 x 8) regions are full resolution chunks
+    - Bigger regions are meshed from heightmaps downsampled to 8 x 8 columns
+    - Region borders hang skirts down to max_depth, so neighbours of other levels never show cracks
+    - Node count (and triangles) grows with the logarithm of the view distance
+    """
+
+    def __init__(self, shader=None, image=None, atlas_map=None, max_depth=-13, root=TERRAIN_LOD_ROOT,
+                 split=TERRAIN_LOD_SPLIT, cache_nodes=TERRAIN_LOD_CACHE_NODES,
+                 upload_budget=TERRAIN_LOD_UPLOAD_BUDGET, shematic=None, cache=None, compact=False,
+                 occlusion=None, spatial=None) -> None:
+        """
+        Camera driven terrain LOD.
+
+        root: (int): blocks per quadtree root side (8 * power of two)
+        split: (float): nodes closer than split * node size to the camera are split in four
+        cache_nodes: (int): uploaded nodes kept (LRU eviction above it)
+        upload_budget: (int): nodes built and uploaded per update (frame)
+        cache: (main.Engine2.Cache.MeshCache): on-disk mesh cache (full resolution nodes)
+        compact: (bool): upload nodes in the compact vertex format (Mesh compact)
+        occlusion: (main.Engine2.Horizon.HorizonCuller): terrain occlusion culling of nodes
+        spatial: (main.Engine2.Spatial.SpatialIndex): scene index the node meshes register with
+        """
+        super().__init__(shader=shader, image=image, atlas_map=atlas_map, mesher="culled", max_depth=max_depth,
+                         render_radius=0, cache_chunks=cache_nodes, upload_budget=upload_budget,
+                         shematic=shematic, cache=cache, compact=compact,
+                         occlusion=occlusion, spatial=spatial)
+        self.root = root
+        self.split = split
+
+    def wanted(self, camera):
+        """
+        Selected node keys (x, z, size, fine neighbours), nearest first
+        - fine neighbours: full resolution neighbour flags of 8 x 8 nodes (NEIGHBOURS order), () for the others
+        """
+
+        camera_x = camera.transformation[0, 3]
+        camera_z = camera.transformation[2, 3]
+        size_x, size_z = self.shematic.terrain_shematic.shape[:2]
+
+        stack = [(x, z, self.root) for x in range(0, size_x - 7, self.root) for z in range(0, size_z - 7, self.root)]
+        nodes = []
+        while stack:
+            x, z, size = stack.pop()
+            # Camera distance to the node square (world x = heightmap x - 4)
+            dx = max(x - 4 - camera_x, 0, camera_x - (x - 4 + size))
+            dz = max(z - 4 - camera_z, 0, camera_z - (z - 4 + size))
+            distance = np.hypot(dx, dz)
+
+            if size > 8 and distance < size * self.split:
+                half = size // 2
+                stack.extend((x + a, z + b, half) for a in (0, half) for b in (0, half)
+                             if x + a <= size_x - 8 and z + b <= size_z - 8)
+            else:
+                nodes.append((distance, x, z, size))
+
+        nodes.sort()
+        fine = {(x, z) for _, x, z, size in nodes if size == 8}
+        keys = []
+        for _, x, z, size in nodes:
+            if size == 8:
+                keys.append((x, z, size, tuple((x + dx * 8, z + dz * 8) in fine for dx, dz in NEIGHBOURS.values())))
+            else:
+                keys.append((x, z, size, ()))
+        return keys
+
+    def load(self, key):
+        x, z, size, fine = key
+        if size == 8:
+            # Full resolution chunk, walls on borders next to coarse nodes reach max_depth
+            chunk = self.chunk((x, z))
+            neighbours = {}
+            for (direction, (dx, dz)), flag in zip(NEIGHBOURS.items(), fine):
+                neighbours[direction] = self.chunk((x + dx * 8, z + dz * 8)) if flag else None
+            chunk.build(neighbours)
+            return self.upload(chunk.vertices, chunk.vertex_uvs, chunk.normals)
+
+        heights, filled = downsample_heights(self.shematic.terrain_shematic, x, z, size)
+        return self.upload(*mesh_coarse(x - 4, z - 4, size // 8, heights, filled, self.max_depth, self.atlas_map))
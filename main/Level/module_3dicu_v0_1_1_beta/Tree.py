@@ -1,9 +1,14 @@
+import numpy as np
 from main.Engine2.Utils import format_vertices
+from main.Engine2.Cache import MeshCache
 from pygame import Vector3
 
+# Bump on any change of the tree level maker output (invalidates cached tree meshes)
+TREE_VERSION = 1
+
 
 class Tree:
-    def __init__(self, position, max_height=4, min_height=0, biome="A", img=None, material=None, shematic=None, atlas_map=None) -> None:
+    def __init__(self, position, max_height=4, min_height=0, biome="A", img=None, material=None, shematic=None, atlas_map=None, build=True, cache=None) -> None:
         """
         Tree generator
 
@@ -12,6 +17,8 @@ class Tree:
             max_height (int): tree maximum height
             min_height (int): tree minimum depth
             biome (str): tree biome
+            build (bool): build the mesh now (False: left to build() / TreeAttach)
+            cache (main.Engine2.Cache.MeshCache): on-disk mesh cache (None: always build)
         """
 
         self.level_name = "tree1"
@@ -22,10 +29,12 @@ class Tree:
         self.image = img
         self.material = material
         self.texture = img
-        self.colors = []
         self.normals = None
+        self.vertices = None
+        self.vertex_uvs = None
         self.leaf_area = [4, 4]
         self.shematic = shematic
+        self.cache = cache
 
         # Texture mapping
         self.atlas_map = atlas_map
@@ -49,15 +58,48 @@ class Tree:
             self.BD = 0.0000099  # border_deficiency
             self.ONE = 1 - self.BD
 
+        if build:
+            self.build()
+
+    def build(self):
+        """
+        Builds tree vertices, uvs and normals
+        """
+
+        if self.cache is not None:
+            key = self.cache_key()
+            if self.load_cache(key):
+                return
+
         self.vertices, self.triangles, uvs, uvs_ind, normals, normals_ind = self.level_maker(self.position)
         self.vertices = format_vertices(self.vertices, self.triangles)
         self.vertex_uvs = format_vertices(uvs, uvs_ind)
         self.normals = format_vertices(normals, normals_ind)
-        
-        for _ in range(len(self.vertices)):
-            self.colors.append(1)
-            self.colors.append(1)
-            self.colors.append(1)
+
+        if self.cache is not None:
+            self.save_cache(key)
+
+    def cache_key(self):
+        """
+        Mesh cache key (schematic slice, generator parameters and tree version)
+        """
+
+        return MeshCache.key(TREE_VERSION, tuple(self.position), self.max_height, self.min_height, self.biome, tuple(self.leaf_area),
+                             self.atlas_length, self.atlas_height, self.HM_F, self.HM_L, self.VM_F, self.VM_L, self.ONE,
+                             np.asarray(self.shematic))
+
+    def load_cache(self, key):
+        entry = self.cache.load(key)
+        if entry is None:
+            return False
+
+        self.vertices = entry["vertices"]
+        self.vertex_uvs = entry["vertex_uvs"]
+        self.normals = entry["normals"]
+        return True
+
+    def save_cache(self, key):
+        self.cache.save(key, vertices=self.vertices, vertex_uvs=self.vertex_uvs, normals=self.normals)
 
     def level_maker(self, center):
         """Tree level maker
@@ -1,7 +1,24 @@
 import random
+import numpy as np
 from main.Level.module_3dicu_v0_1_1_beta.Tree import *
 from pygame import Vector3
 from main.Level.module_3dicu_v0_1_1_beta.Shematic import Shematic
+from main.Engine2.Workers import run_parallel, split_batches
+from main.Engine2.Mesh import Mesh
+from main.Engine2.Settings2 import *
+
+
+def tree_batch(trees):
+    """
+    Process pool task: builds a batch of trees (counts are returned as an array)
+    """
+
+    for tree in trees:
+        tree.cache = None  # cached by the collecting process
+        tree.build()
+
+    return (np.concatenate([tree.vertices for tree in trees]), np.concatenate([tree.vertex_uvs for tree in trees]),
+            np.concatenate([tree.normals for tree in trees]), np.array([len(tree.vertices) for tree in trees], np.int64))
 
 
 class TreeAttach:
@@ -10,7 +27,15 @@ class TreeAttach:
     - Making Forests !
     """
     
-    def __init__(self, startX=0, startY=0, startZ=0, numberx=1, numberz= 1, shader=None, texture=None, atlas_map=None, seed=100, in_chance=[0, 1, 2, 3, 4]) -> None:
+    def __init__(self, startX=0, startY=0, startZ=0, numberx=1, numberz= 1, shader=None, texture=None, atlas_map=None, seed=100, in_chance=[0, 1, 2, 3, 4], workers=None, cache=None, instanced=False) -> None:
+        """
+        Multiple tree maker.
+
+        workers: (int): build on a process pool with this many processes (None: main process)
+        cache: (main.Engine2.Cache.MeshCache): on-disk mesh cache, only trees missing in it are built
+        instanced: (bool): build one tree template (self.template) and per tree offsets (self.offsets)
+            instead of every tree, draw with instanced_mesh()
+        """
         print("Attaching Trees...")
         self.forest = []
         self.shader = shader
@@ -23,18 +48,81 @@ class TreeAttach:
         self.end = numberz * 8 + 1
         self.shematic = Shematic(numberx)
         self.in_chance = in_chance
-        
-        random.seed(seed)
+        self.workers = workers
+        self.cache = cache
+        self.instanced = instanced
+        self.template = None
+        self.offsets = None
+
+        self.random = random.Random(seed)  # own generator: attaches can be built on parallel threads
         self.load_forest()
-        
-    
+
     def load_forest(self):
         print("Building Trees (Multiple Level.Trees Callings)...")
+        build = not self.instanced and (self.workers is None or self.workers < 2)
         for x in range(self.sx, self.end, 8):
             for z in range(self.sz, self.end, 8):
                 y = int(self.shematic.locate(x, z)[3][3])
                 if y <= 0 or y >= 15:
                     continue
                 else:
-                    if random.randint(0, 9) in self.in_chance:
-                        self.forest.append(Tree(Vector3(x, 0, z), shematic=self.shematic.locate(x, z), atlas_map=self.atlas_map))
+                    if self.random.randint(0, 9) in self.in_chance:
+                        self.forest.append(Tree(Vector3(x, 0, z), shematic=self.shematic.locate(x, z), atlas_map=self.atlas_map, build=build, cache=self.cache))
+
+        if self.instanced:
+            self.load_template()
+        elif not build and self.forest:
+            self.load_parallel()
+
+    def load_template(self):
+        """
+        Tree template at the origin (trunk base at y = 0) and (x, trunk base y, z) offsets of every tree
+        """
+
+        self.template = Tree(Vector3(0, 0, 0), shematic=np.full((8, 8), -1), atlas_map=self.atlas_map, cache=self.cache)
+        self.offsets = np.array([(tree.position.x, int(tree.shematic[3][3]) + 1, tree.position.z) for tree in self.forest],
+                                np.float32).reshape(-1, 3)
+
+    def instanced_mesh(self, shader=None, image=None, indexed=True):
+        """
+        Whole forest as one instanced Mesh (template uploaded once, one draw call)
+
+        Args:
+            shader (Material): instanced shader (Shaders/instancedvert.vs)
+            image (str): texture file
+            indexed (bool): weld the template into an element buffer
+        """
+
+        return Mesh(vertices=self.template.vertices,
+                    imagefile=image if image is not None else self.texture,
+                    vertex_uvs=self.template.vertex_uvs,
+                    vertex_normals=self.template.normals,
+                    color=(CHUNK_COLOR_R, CHUNK_COLOR_G, CHUNK_COLOR_B),
+                    instance_offsets=self.offsets,
+                    indexed=indexed,
+                    material=shader if shader is not None else self.shader)
+
+    def load_parallel(self):
+        trees = self.forest
+        if self.cache is not None:
+            keys = [tree.cache_key() for tree in trees]
+            missing = [i for i, (tree, key) in enumerate(zip(trees, keys)) if not tree.load_cache(key)]
+            trees = [trees[i] for i in missing]
+            keys = [keys[i] for i in missing]
+            if not trees:
+                return
+
+        tasks = [(batch,) for batch in split_batches(trees, self.workers * 4)]
+        results = run_parallel(tree_batch, tasks, self.workers)
+
+        for batch, (vertices, uvs, normals, counts) in zip(tasks, results):
+            offsets = np.cumsum(counts)[:-1]
+            for tree, t_vertices, t_uvs, t_normals in zip(batch[0], np.split(vertices, offsets),
+                                                          np.split(uvs, offsets), np.split(normals, offsets)):
+                tree.vertices = t_vertices
+                tree.vertex_uvs = t_uvs
+                tree.normals = t_normals
+
+        if self.cache is not None:
+            for tree, key in zip(trees, keys):
+                tree.save_cache(key)
@@ -0,0 +1,160 @@
+import numpy as np
+from main.Level.module_3dicu_v0_1_1_beta.Mesher import BLOCK_AIR, column_heights, depth_blocks
+
+# Palette index sizes (a power of two, indices never straddle bytes)
+VOXEL_BITS = (1, 2, 4, 8, 16)
+
+
+class VoxelChunk:
+    """
+    Palette compressed chunk voxels !
+    - [ROW][COLUMN][DEPTH] block types, depth = bottom + depth index (every column stored contiguously)
+    - palette: block types in use, voxels hold palette indices packed at 1, 2, 4, 8 or 16 bits
+    - get() / set() are O(1), blocks() unpacks everything at once for the mesher
+    """
+
+    def __init__(self, blocks, bottom) -> None:
+        """
+        Args:
+            blocks (np.ndarray): [ROW][COLUMN][DEPTH] block types
+            bottom (int): depth of the first depth index
+        """
+
+        blocks = np.asarray(blocks)
+        self.shape = blocks.shape
+        self.bottom = int(bottom)
+        palette, indices = np.unique(np.append(blocks.ravel(), BLOCK_AIR), return_inverse=True)
+        self.palette = palette.astype(np.uint16)
+        self.bits = 1
+        self.data = None
+        self.pack(indices.ravel()[:-1])
+
+    @classmethod
+    def from_shematic(cls, shematic, max_depth=-13, top=None):
+        """
+        Voxels of a chunk shematic (columns filled from max_depth to their height, block types by depth)
+
+        Args:
+            shematic (np.ndarray): chunk shematic ([COLUMN][ROW] heights)
+            max_depth (int): chunk maximum depth
+            top (int): highest stored depth (None: highest column, more room for later edits when given)
+        """
+
+        heights = column_heights(shematic)
+        top = max(int(heights.max()), max_depth) if top is None else top
+        depths = np.arange(max_depth, top + 1)
+        blocks = np.where((depths <= heights[..., None]), depth_blocks(depths), BLOCK_AIR)
+        return cls(blocks, max_depth)
+
+    @property
+    def top(self):
+        return self.bottom + self.shape[2] - 1
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.palette.nbytes
+
+    def pack(self, indices):
+        """
+        Packs palette indices with the smallest index size holding the palette
+        """
+
+        self.bits = next(bits for bits in VOXEL_BITS if 1 << bits >= len(self.palette))
+        if self.bits == 16:
+            self.data = indices.astype(np.uint16)
+            return
+
+        per_byte = 8 // self.bits
+        padded = np.zeros(-(-len(indices) // per_byte) * per_byte, np.uint8)
+        padded[:len(indices)] = indices
+        shifts = np.arange(per_byte, dtype=np.uint8) * self.bits
+        self.data = np.bitwise_or.reduce(padded.reshape(-1, per_byte) << shifts, axis=1).astype(np.uint8)
+
+    def indices(self) -> np.ndarray:
+        """
+        Unpacked palette indices (flat)
+        """
+
+        if self.bits == 16:
+            return self.data
+        per_byte = 8 // self.bits
+        shifts = np.arange(per_byte, dtype=np.uint8) * self.bits
+        return ((self.data[:, None] >> shifts) & ((1 << self.bits) - 1)).ravel()[:int(np.prod(self.shape))]
+
+    def blocks(self) -> np.ndarray:
+        """
+        [ROW][COLUMN][DEPTH] block types
+        """
+
+        return self.palette[self.indices()].reshape(self.shape)
+
+    def occupancy(self, bottom, top) -> np.ndarray:
+        """
+        Solid blocks as [ROW][COLUMN][DEPTH] for depths bottom..top (air outside the stored depths)
+        """
+
+        solid = np.zeros(self.shape[:2] + (top - bottom + 1,), bool)
+        first, last = max(bottom, self.bottom), min(top, self.top)
+        if first <= last:
+            solid[..., first - bottom:last - bottom + 1] = \
+                self.blocks()[..., first - self.bottom:last - self.bottom + 1] != BLOCK_AIR
+        return solid
+
+    def index(self, row, column, depth):
+        return (row * self.shape[1] + column) * self.shape[2] + depth - self.bottom
+
+    def get(self, row, column, depth):
+        """
+        Block type at a position (air outside the chunk)
+        """
+
+        if not (0 <= row < self.shape[0] and 0 <= column < self.shape[1] and self.bottom <= depth <= self.top):
+            return BLOCK_AIR
+
+        i = self.index(row, column, depth)
+        if self.bits == 16:
+            return int(self.palette[self.data[i]])
+        per_byte = 8 // self.bits
+        return int(self.palette[(self.data[i // per_byte] >> (i % per_byte * self.bits)) & ((1 << self.bits) - 1)])
+
+    def set(self, row, column, depth, block):
+        """
+        Sets a block type (depths outside the stored range grow it, a new type grows the palette)
+        """
+
+        if not (self.bottom <= depth <= self.top):
+            blocks = self.blocks()
+            bottom = min(self.bottom, depth)
+            grown = np.full(self.shape[:2] + (max(self.top, depth) - bottom + 1,), BLOCK_AIR, blocks.dtype)
+            grown[..., self.bottom - bottom:self.bottom - bottom + self.shape[2]] = blocks
+            self.__init__(grown, bottom)
+
+        found = np.nonzero(self.palette == block)[0]
+        if len(found) == 0:
+            indices = self.indices()
+            self.palette = np.append(self.palette, np.uint16(block))
+            self.pack(indices)
+            found = [len(self.palette) - 1]
+
+        i = self.index(row, column, depth)
+        if self.bits == 16:
+            self.data[i] = found[0]
+            return
+        per_byte = 8 // self.bits
+        shift = i % per_byte * self.bits
+        mask = ((1 << self.bits) - 1) << shift
+        self.data[i // per_byte] = (int(self.data[i // per_byte]) & ~mask) | (int(found[0]) << shift)
+
+    def compress(self):
+        """
+        Drops palette types no voxel uses anymore (after edits)
+        """
+
+        self.__init__(self.blocks(), self.bottom)
+
+    def key_parts(self):
+        """
+        Mesh cache key parts
+        """
+
+        return [self.bottom, self.shape, self.palette, self.data]
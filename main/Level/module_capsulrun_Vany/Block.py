@@ -5,7 +5,7 @@ from main.Engine2.Utils import format_vertices
 
 
 class Block(Mesh):
-    def __init__(self, x, y, z, texture, atlas_map=(1, 1, 0, 1, 0, 1), material=None, multi_face=False) -> None:
+    def __init__(self, x, y, z, texture, atlas_map=(1, 1, 0, 1, 0, 1), material=None, multi_face=False, spatial=None, registry=None) -> None:
         """Block creator.
 
         Args:
@@ -15,6 +15,9 @@ class Block(Mesh):
             atlas_map (tuple): (L, H, HMF, HML, VMF, VML)
                 L = 15.9999991, H = 15.9999991 for 16x15 atlas
             material (): program shaders (only for instance drawing)
+            spatial (main.Engine2.Spatial.SpatialIndex): scene index the block registers with
+            registry (main.Engine2.Geometry.GeometryRegistry): blocks of the same atlas map / faces / material share
+                one cube (built at the origin, self.vertices stay None for shared blocks)
 
         Returns:
             None
@@ -25,7 +28,6 @@ class Block(Mesh):
         self.gap = 1
         self.uvs_face = None
         self.atlas_map = atlas_map
-        self.colors = []
 
         # Texture atlas locations
         self.atlas_length = atlas_map[0]
@@ -45,33 +47,47 @@ class Block(Mesh):
             "DIRT_Y": (2, 3, 0, 1)
         }
 
-        self.vertices, self.triangles, uvs, uvs_ind, normals, normals_ind = self.level_maker()
+        # Shared cube: vertices at the origin, translated twice as far (baked blocks have vertices at
+        # block_pos and are translated by it as well)
+        translation = Vector3(x, y, z)
+        key = geometry = None
+        if registry is not None and material:
+            key = registry.key("block", tuple(atlas_map), multi_face, self.gap, material.program_id)
+            geometry = registry.acquire(key)
+            translation = translation * 2
 
-        self.vertices = format_vertices(self.vertices, self.triangles)
-        self.uvs = format_vertices(uvs, uvs_ind)
-        self.normals = format_vertices(normals, normals_ind)
+        self.vertices = self.triangles = self.uvs = self.normals = None
+        if geometry is None:
+            origin = Vector3(0, 0, 0) if registry is not None and material else self.block_pos
+            self.vertices, self.triangles, uvs, uvs_ind, normals, normals_ind = self.level_maker(origin)
 
-        if material:
-            for _ in range(len(self.vertices * 3)):
-                self.colors.append(1)
-                self.colors.append(1)
-                self.colors.append(1)
+            self.vertices = format_vertices(self.vertices, self.triangles)
+            self.uvs = format_vertices(uvs, uvs_ind)
+            self.normals = format_vertices(normals, normals_ind)
 
+        if material:
             super().__init__(
                 vertices=self.vertices,
                 imagefile=self.texture,
                 vertex_normals=self.normals,
                 vertex_uvs=self.uvs,
-                vertex_colors=self.colors,
+                color=(1, 1, 1),
                 draw_type=GL_TRIANGLES,
-                translation=Vector3(x, y, z),
-                material=self.material)
+                translation=translation,
+                material=self.material,
+                spatial=spatial,
+                geometry=geometry)
 
-    def level_maker(self):
+            if key is not None and geometry is None:
+                registry.register(key, self)
+
+    def level_maker(self, position=None):
         """
-        Make block
+        Make block (around position, None: block_pos)
         """
 
+        position = self.block_pos if position is None else position
+
         normals = [(0.0, 0.0, 1.0), (0.0, 0.0, 1.0), (0.0, 0.0, 1.0),
                    (0.0, 0.0, 1.0), (0.0, 1.0, 0.0), (0.0, 1.0, 0.0),
                    (0.0, 1.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, -1.0),
@@ -93,16 +109,16 @@ class Block(Mesh):
         normal_counter = 0
 
         # Top vertices
-        tlu = (self.block_pos.x - self.gap, self.block_pos.y, self.block_pos.z - self.gap)
-        tld = (self.block_pos.x - self.gap, self.block_pos.y, self.block_pos.z + self.gap)
-        tru = (self.block_pos.x + self.gap, self.block_pos.y, self.block_pos.z - self.gap)
-        trd = (self.block_pos.x + self.gap, self.block_pos.y, self.block_pos.z + self.gap)
+        tlu = (position.x - self.gap, position.y, position.z - self.gap)
+        tld = (position.x - self.gap, position.y, position.z + self.gap)
+        tru = (position.x + self.gap, position.y, position.z - self.gap)
+        trd = (position.x + self.gap, position.y, position.z + self.gap)
 
         # Bottom vertices
-        blu = (self.block_pos.x - self.gap, self.block_pos.y - self.gap - 1, self.block_pos.z - self.gap)
-        bld = (self.block_pos.x - self.gap, self.block_pos.y - self.gap - 1, self.block_pos.z + self.gap)
-        bru = (self.block_pos.x + self.gap, self.block_pos.y - self.gap - 1, self.block_pos.z - self.gap)
-        brd = (self.block_pos.x + self.gap, self.block_pos.y - self.gap - 1, self.block_pos.z + self.gap)
+        blu = (position.x - self.gap, position.y - self.gap - 1, position.z - self.gap)
+        bld = (position.x - self.gap, position.y - self.gap - 1, position.z + self.gap)
+        bru = (position.x + self.gap, position.y - self.gap - 1, position.z - self.gap)
+        brd = (position.x + self.gap, position.y - self.gap - 1, position.z + self.gap)
 
         # Mesh triangles
         level_vertices.extend([tlu, tld, tru, trd, blu, bld, bru, brd])
@@ -0,0 +1,29 @@
+#version 330 core
+in vec3 position;
+in vec3 vertex_color;
+in vec3 vertex_normal;
+in vec2 vertex_uv;
+in vec4 vertex_tile;
+uniform mat4 projection_mat;
+uniform mat4 model_mat;
+uniform mat4 view_mat;
+uniform vec4 position_decode;
+out vec3 color;
+out vec3 normal;
+out vec3 fragpos;
+out vec3 view_pos;
+out vec2 UV;
+out vec4 tile;
+void main()
+{
+    vec3 local_position = position_decode.xyz + position * position_decode.w;
+    view_pos = vec3(inverse(model_mat) *
+                    vec4(view_mat[3][0], view_mat[3][1], view_mat[3][2],1));
+    gl_Position = projection_mat * inverse(view_mat) * model_mat * vec4(local_position,1);
+    vec3 new_normal = vec3(-vertex_normal.x, 1, -vertex_normal.z);
+    normal = mat3(transpose(inverse(model_mat))) * new_normal;
+    fragpos = vec3(model_mat * vec4(local_position,1));
+    color = vertex_color;
+    UV = vertex_uv;
+    tile = vertex_tile;
+}
\ No newline at end of file